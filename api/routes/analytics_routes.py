@@ -3,70 +3,167 @@ import sys
 import uvicorn
 import pandas as pd
 from typing import Union, List, Dict, Optional, Any
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from services.analytics import Analytics
 from models.crypto_asset import FetchAPI
+from models.portfolio import Portfolio
+from repositories.history_repository import HISTORY_PERIODS, HistoryRepository
+from utils.executor import run_blocking
+from utils.serialization import STREAMING_FORMATS, negotiate_format, series_response, series_to_records, streaming_series_response
 
 app = FastAPI()
+# Compress large analytics payloads for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+class IndicatorSpec(BaseModel): # One indicator to compute in a bundle
+    name: str
+    window: int = 30
+    risk_free_rate: float = 0.02
+
+class BundleRequest(BaseModel): # Indicators to compute from a single history fetch
+    period: str = '1y'
+    indicators: List[IndicatorSpec]
+
+class BatchRequest(BaseModel): # Indicators to compute for many assets at once
+    symbols: List[str]
+    period: str = '1y'
+    indicators: List[IndicatorSpec]
+    latest_only: bool = True
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Crypto Portfolio API"}
 
-@app.get("/analytics/{asset}/rolling_mean")
-async def get_rolling_mean(asset: str, window: int, period: str):
+def check_symbols(*symbols):
+    # Symbols name files in the history store, reject anything that is not a plain ticker
+    invalid = [symbol for symbol in symbols if not HistoryRepository.is_valid_symbol(symbol)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid symbols: {', '.join(invalid)}")
+
+def check_period(period):
+    # Unknown periods would otherwise fail deep in the history store, possibly mid-stream
+    if not HistoryRepository.is_valid_period(period):
+        raise HTTPException(status_code=400, detail=f"Unsupported period: {period}, expected one of {', '.join(HISTORY_PERIODS)}")
+
+def indicator_value(value, latest_only=False):
+    # Series become date/value records (or just their last value), scalars become floats
+    if isinstance(value, pd.Series):
+        if not latest_only:
+            return series_to_records(value)
+        value = value.iloc[-1] if len(value) else None
+    return None if value is None or pd.isna(value) else float(value)
+
+@app.post("/analytics/batch")
+async def get_batch_indicators(batch: BatchRequest):
+    check_symbols(*batch.symbols)
+    check_period(batch.period)
+    indicators = [indicator.model_dump() for indicator in batch.indicators]
+    try:
+        Analytics.validate_batch(batch.symbols, indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     analytics = Analytics(FetchAPI())
-    rolling_mean = analytics.rolling_mean(asset, window, period)
+    results = await run_blocking(
+        analytics.batch_indicators, batch.symbols, indicators, batch.period
+    )
     
-    # Convert pandas Series to a list of dictionaries with date and value
-    # Replace NaN values with None which is JSON serializable
-    result = [
-        {"date": date.strftime("%Y-%m-%d"), "value": float(value) if not pd.isna(value) else None}
-        for date, value in rolling_mean.items()
-    ]
+    data = {}
+    for symbol, result in results.items():
+        if "error" in result:
+            data[symbol] = {"error": result["error"]}
+        else:
+            data[symbol] = {
+                "indicators": {
+                    label: indicator_value(value, batch.latest_only)
+                    for label, value in result["indicators"].items()
+                }
+            }
     
-    return {"asset": asset, "window": window, "period": period, "data": result}
+    return {"period": batch.period, "latest_only": batch.latest_only, "results": data}
+
+@app.get("/analytics/{asset}/rolling_mean")
+async def get_rolling_mean(request: Request, asset: str, window: int, period: str, format: Optional[str] = Query(None, description="Response format: records, columnar, csv, arrow, ndjson or sse (defaults to the Accept header)")):
+    check_symbols(asset)
+    check_period(period)
+    fmt = negotiate_format(format, request.headers.get("accept"))
+    analytics = Analytics(FetchAPI())
+    if fmt in STREAMING_FORMATS:
+        return streaming_series_response(analytics.iter_indicator(asset, 'rolling_mean', window, period), {"asset": asset, "window": window, "period": period}, fmt)
+    rolling_mean = await run_blocking(analytics.rolling_mean, asset, window, period)
+    return series_response(rolling_mean, {"asset": asset, "window": window, "period": period}, fmt)
 
 @app.get("/analytics/{asset}/moving_volume")
-async def get_moving_volume(asset: str, window: int = Query(..., description="Window size in days"), period: str = Query(..., description="Time period (e.g., '1mo', '1y')")):
+async def get_moving_volume(request: Request, asset: str, window: int = Query(..., description="Window size in days"), period: str = Query(..., description="Time period (e.g., '1mo', '1y')"), format: Optional[str] = Query(None, description="Response format: records, columnar, csv, arrow, ndjson or sse (defaults to the Accept header)")):
+    check_symbols(asset)
+    check_period(period)
+    fmt = negotiate_format(format, request.headers.get("accept"))
     analytics = Analytics(FetchAPI())
-    moving_volume = analytics.moving_volume(asset, window, period)
-    
-    # Convert pandas Series to a list of dictionaries with date and value
-    # Replace NaN values with None which is JSON serializable
-    result = [
-        {"date": date.strftime("%Y-%m-%d"), "value": float(value) if not pd.isna(value) else None}
-        for date, value in moving_volume.items()
-    ]
-    
-    return {"asset": asset, "window": window, "period": period, "data": result}
+    if fmt in STREAMING_FORMATS:
+        return streaming_series_response(analytics.iter_indicator(asset, 'moving_volume', window, period), {"asset": asset, "window": window, "period": period}, fmt)
+    moving_volume = await run_blocking(analytics.moving_volume, asset, window, period)
+    return series_response(moving_volume, {"asset": asset, "window": window, "period": period}, fmt)
 
 @app.get("/analytics/{asset}/volatility")
-async def get_volatility(asset: str, period: str = Query('1y', description="Time period (e.g., '1mo', '1y')"), window: int = Query(30, description="Window size in days")):
+async def get_volatility(request: Request, asset: str, period: str = Query('1y', description="Time period (e.g., '1mo', '1y')"), window: int = Query(30, description="Window size in days"), format: Optional[str] = Query(None, description="Response format: records, columnar, csv, arrow, ndjson or sse (defaults to the Accept header)")):
+    check_symbols(asset)
+    check_period(period)
+    fmt = negotiate_format(format, request.headers.get("accept"))
     analytics = Analytics(FetchAPI())
-    volatility = analytics.calculate_volatility(asset, period, window)
-    
-    # Convert pandas Series to a list of dictionaries with date and value
-    # Replace NaN values with None which is JSON serializable
-    result = [
-        {"date": date.strftime("%Y-%m-%d"), "value": float(value) if not pd.isna(value) else None}
-        for date, value in volatility.items()
-    ]
-    
-    return {"asset": asset, "period": period, "window": window, "data": result}
+    if fmt in STREAMING_FORMATS:
+        return streaming_series_response(analytics.iter_indicator(asset, 'volatility', window, period), {"asset": asset, "period": period, "window": window}, fmt)
+    volatility = await run_blocking(analytics.calculate_volatility, asset, period, window)
+    return series_response(volatility, {"asset": asset, "period": period, "window": window}, fmt)
 
 @app.get("/analytics/{asset}/sharpe_ratio")
 async def get_sharpe_ratio(asset: str, risk_free_rate: float = Query(0.02, description="Risk-free rate (default: 2%)"), period: str = Query('1y', description="Time period (e.g., '1mo', '1y')")):
+    check_symbols(asset)
+    check_period(period)
     analytics = Analytics(FetchAPI())
-    sharpe_ratio = analytics.calculate_sharpe_ratio(asset, risk_free_rate, period)
+    sharpe_ratio = await run_blocking(analytics.calculate_sharpe_ratio, asset, risk_free_rate, period)
     
     # Handle potential NaN values
     sharpe_value = None if pd.isna(sharpe_ratio) else float(sharpe_ratio)
     
     return {"asset": asset, "risk_free_rate": risk_free_rate, "period": period, "sharpe_ratio": sharpe_value}
 
+@app.post("/analytics/{asset}/bundle")
+async def get_indicator_bundle(asset: str, bundle: BundleRequest):
+    check_symbols(asset)
+    check_period(bundle.period)
+    analytics = Analytics(FetchAPI())
+    try:
+        results = await run_blocking(
+            analytics.indicator_bundle, asset, [indicator.model_dump() for indicator in bundle.indicators], bundle.period
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data = {label: indicator_value(value) for label, value in results.items()}
+    return {"asset": asset, "period": bundle.period, "indicators": data}
+
+def get_user_holdings(user_name):
+    portfolio = Portfolio.from_user_name(user_name)
+    if portfolio is None:
+        return None
+    return portfolio.fetch_user_assets()
+
+@app.get("/analytics/users/{user_name}/risk")
+async def get_portfolio_risk(user_name: str, risk_free_rate: float = Query(0.02, description="Risk-free rate (default: 2%)"), period: str = Query('1y', description="Time period (e.g., '1mo', '1y')")):
+    check_period(period)
+    holdings = await run_blocking(get_user_holdings, user_name)
+    if not holdings:
+        raise HTTPException(status_code=404, detail=f"No assets found for user {user_name}")
+    analytics = Analytics(FetchAPI())
+    try:
+        risk = await run_blocking(analytics.portfolio_risk, holdings, risk_free_rate, period)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    return {"user_name": user_name, "risk_free_rate": risk_free_rate, "period": period, **risk}
+
 if __name__ == "__main__":
     uvicorn.run("analytics_routes:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
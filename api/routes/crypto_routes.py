@@ -6,10 +6,13 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from models.crypto_asset import CryptoAsset, FetchAPI
+from models.crypto_asset import CryptoAsset, FetchAPI, price_cache, request_flights, history_flights
+from repositories.history_repository import HistoryRepository
+from services.price_refresher import price_refresher, refresher_lifespan
+from utils.executor import run_blocking, get_executor_stats
 
 
-app = FastAPI()
+app = FastAPI(lifespan=refresher_lifespan)
 
 class AssetInfoResponse(BaseModel): 
     asset: str
@@ -25,7 +28,7 @@ async def root():
 @app.get("/assets/{asset}/price", response_model=AssetInfoResponse)
 async def get_asset_current_price(asset: str):
     crypto_asset = CryptoAsset(asset, FetchAPI())
-    current_price = crypto_asset.get_value()
+    current_price = await run_blocking(crypto_asset.get_value)
     return AssetInfoResponse(
         asset=asset,
         current_price=current_price
@@ -34,7 +37,7 @@ async def get_asset_current_price(asset: str):
 @app.get("/assets/{asset}/max_supply")
 async def get_asset_max_supply(asset: str):
     crypto_asset = CryptoAsset(asset, FetchAPI())
-    max_supply = crypto_asset.get_max_supply()
+    max_supply = await run_blocking(crypto_asset.get_max_supply)
     return AssetInfoResponse(
         asset=asset,
         max_supply=max_supply
@@ -43,7 +46,7 @@ async def get_asset_max_supply(asset: str):
 @app.get("/assets/{asset}/market_cap")
 async def get_asset_market_cap(asset: str):
     crypto_asset = CryptoAsset(asset, FetchAPI())
-    market_cap = crypto_asset.get_market_cap()
+    market_cap = await run_blocking(crypto_asset.get_market_cap)
     return AssetInfoResponse(
         asset=asset,
         market_cap=market_cap
@@ -52,11 +55,35 @@ async def get_asset_market_cap(asset: str):
 @app.get("/assets/{asset}/total_volume")
 async def get_asset_total_volume(asset: str):
     crypto_asset = CryptoAsset(asset, FetchAPI())
-    total_volume = crypto_asset.get_total_volume()
+    total_volume = await run_blocking(crypto_asset.get_total_volume)
     return AssetInfoResponse(
         asset=asset,
         total_volume=total_volume
     )
 
+@app.get("/assets/{asset}/info", response_model=AssetInfoResponse)
+async def get_asset_info(asset: str):
+    crypto_asset = CryptoAsset(asset, FetchAPI())
+    await run_blocking(crypto_asset.hydrate)
+    return AssetInfoResponse(
+        asset=asset,
+        max_supply=crypto_asset.max_supply,
+        market_cap=crypto_asset.market_cap,
+        current_price=crypto_asset.current_price,
+        total_volume=crypto_asset.total_volume
+    )
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "price_cache": price_cache.get_stats(),
+        "transport": FetchAPI.get_transport_stats(),
+        "refresher": price_refresher.get_status(),
+        "request_flights": request_flights.get_stats(),
+        "history_flights": history_flights.get_stats(),
+        "executor": get_executor_stats(),
+        "history": HistoryRepository.get_stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run("crypto_routes:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
@@ -1,15 +1,18 @@
+import asyncio
 import os
 import sys
 import uvicorn
 from typing import Union, List, Dict, Optional, Any
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
 # Add the project root to the Python path when needed
 # This approach allows imports to work both when imported as a module and when run directly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from models.portfolio import Portfolio
-from models.user import User
+from services.price_refresher import price_refresher, refresher_enabled, refresher_lifespan
+from services.valuation_feed import valuation_feed
+from utils.executor import run_blocking
 
 # Pydantic models for request/response validation
 
@@ -17,6 +20,9 @@ class AssetCreate(BaseModel): # Contains asset and quantity information
     asset: str
     quantity: float
 
+class BulkAssetUpdate(BaseModel): # Contains many asset quantity changes, negative to remove
+    assets: List[AssetCreate]
+
 class AssetResponse(BaseModel): # Contains asset and quantity information
     asset: str
     quantity: float
@@ -37,22 +43,24 @@ class PortfolioValuationResponse(BaseModel): # Used for total portfolio valuatio
     total_value: float
     assets: List[AssetValueResponse]
 
-app = FastAPI()
+app = FastAPI(lifespan=refresher_lifespan)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Crypto Portfolio API"}
 
 def get_user_portfolio(user_name):
-    user = User.fetch_user_by_name(user_name)
-    portfolio = Portfolio(user)
+    # Loads the user and their holdings in one round trip
+    portfolio = Portfolio.from_user_name(user_name)
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail=f"User {user_name} not found")
     return portfolio
 
 # User assets endpoints - RESTful structure
 @app.get("/users/{user_name}/assets", response_model=PortfolioResponse)
 async def get_user_assets(user_name):
-    portfolio = get_user_portfolio(user_name)
-    assets_data = portfolio.fetch_user_assets()
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    assets_data = await run_blocking(portfolio.fetch_user_assets)
     if not assets_data:
         raise HTTPException(status_code=404, detail=f"No assets found for user {user_name}")
     return PortfolioResponse(
@@ -61,8 +69,8 @@ async def get_user_assets(user_name):
 
 @app.get("/users/{user_name}/assets/{asset}", response_model=AssetResponse)
 async def get_user_singular_asset(user_name, asset):
-    portfolio = get_user_portfolio(user_name)
-    asset_data = portfolio.fetch_singular_asset(asset)
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    asset_data = await run_blocking(portfolio.fetch_singular_asset, asset)
     if not asset_data:
         raise HTTPException(status_code=404, detail=f"Asset {asset} not found for user {user_name}")
     return AssetResponse(
@@ -72,8 +80,8 @@ async def get_user_singular_asset(user_name, asset):
 
 @app.post("/users/{user_name}/assets", response_model=AssetResponse)
 async def add_asset(user_name, asset: AssetCreate):
-    portfolio = get_user_portfolio(user_name)
-    added_asset = portfolio.add_asset(asset.asset, asset.quantity)
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    added_asset = await run_blocking(portfolio.add_asset, asset.asset, asset.quantity)
     if not added_asset:
         raise HTTPException(status_code=400, detail=f"Failed to add {asset.asset} to portfolio")
     return AssetResponse(
@@ -81,10 +89,21 @@ async def add_asset(user_name, asset: AssetCreate):
         quantity = added_asset[0]['quantity']
     )
 
+@app.post("/users/{user_name}/assets/bulk", response_model=PortfolioResponse)
+async def apply_asset_updates(user_name, update: BulkAssetUpdate):
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    deltas = [{"asset": asset.asset, "quantity": asset.quantity} for asset in update.assets]
+    updated_assets = await run_blocking(portfolio.apply_asset_deltas, deltas)
+    if updated_assets is None:
+        raise HTTPException(status_code=400, detail=f"Failed to apply asset updates for user {user_name}")
+    return PortfolioResponse(
+        assets=updated_assets
+    )
+
 @app.delete("/users/{user_name}/assets/{asset}", response_model=AssetResponse)
 async def remove_asset(user_name, asset, quantity: float = Query(..., description="Amount to remove")):
-    portfolio = get_user_portfolio(user_name)
-    removed_asset = portfolio.remove_asset(asset, quantity)
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    removed_asset = await run_blocking(portfolio.remove_asset, asset, quantity)
     if not removed_asset:
         raise HTTPException(status_code=400, detail=f"Failed to remove {asset} from portfolio")
     return AssetResponse(
@@ -92,35 +111,69 @@ async def remove_asset(user_name, asset, quantity: float = Query(..., descriptio
         quantity = removed_asset[0]['quantity']
     )
 
-@app.get("/users/{user_name}/valuation", response_model=PortfolioValuationResponse)
-async def get_total_portfolio_valuation(user_name):
+def build_portfolio_valuation(user_name):
     portfolio = get_user_portfolio(user_name)
-    total_value = portfolio.total_portfolio_valuation()
-    
-    # Get individual asset values for the response
-    assets_data = portfolio.fetch_user_assets()
-    asset_values = []
-    for asset_data in assets_data:
-        asset_symbol = asset_data['asset']
-        asset_value = portfolio.crypto_current_price(asset_symbol)
-        asset_values.append(AssetValueResponse(
-            asset=asset_symbol,
-            value=asset_value
-        ))
-    
+    snapshot = portfolio.valuation_snapshot()
     return PortfolioValuationResponse(
-        total_value=total_value,
-        assets=asset_values
+        total_value=snapshot["total_value"],
+        assets=[
+            AssetValueResponse(asset=asset["asset"], value=asset["value"])
+            for asset in snapshot["assets"]
+        ]
     )
 
+@app.get("/users/{user_name}/valuation", response_model=PortfolioValuationResponse)
+async def get_total_portfolio_valuation(user_name):
+    return await run_blocking(build_portfolio_valuation, user_name)
+
 @app.get("/users/{user_name}/assets/{asset}/value", response_model=AssetValueResponse)
 async def get_asset_total_value(user_name, asset):
-    portfolio = get_user_portfolio(user_name)
-    value = portfolio.crypto_current_price(asset)
+    portfolio = await run_blocking(get_user_portfolio, user_name)
+    value = await run_blocking(portfolio.crypto_current_price, asset)
     return AssetValueResponse(
         asset=asset,
         value=value
     )
 
+@app.websocket("/users/{user_name}/valuation/ws")
+async def portfolio_valuation_feed(websocket: WebSocket, user_name: str):
+    # Sends the full valuation once, then only changed asset values and the new total
+    await websocket.accept()
+    portfolio = await run_blocking(Portfolio.from_user_name, user_name)
+    if portfolio is None:
+        await websocket.close(code=4404, reason="User not found")
+        return
+    snapshot = await run_blocking(portfolio.valuation_snapshot)
+    await websocket.send_json({"type": "snapshot", **snapshot})
+    
+    subscription = valuation_feed.subscribe(snapshot["assets"], asyncio.get_running_loop())
+    price_refresher.start()
+    
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+    
+    disconnect = asyncio.create_task(wait_for_disconnect())
+    try:
+        while not disconnect.done():
+            delta = asyncio.create_task(subscription.queue.get())
+            await asyncio.wait({delta, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if not delta.done():
+                delta.cancel()
+                break
+            await websocket.send_json({"type": "delta", **delta.result()})
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: sending after the client went away
+        pass
+    finally:
+        disconnect.cancel()
+        valuation_feed.unsubscribe(subscription)
+        # Started on demand for live feeds, so stop once the last one is gone
+        if not valuation_feed.symbols() and not refresher_enabled():
+            await price_refresher.stop()
+
 if __name__ == "__main__":
     uvicorn.run("portfolio_routes:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
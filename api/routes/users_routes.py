@@ -1,14 +1,18 @@
+import json
 import os
 import sys
 import uvicorn
-from typing import Union
-from fastapi import FastAPI, HTTPException
+from typing import Union, Optional
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Add the project root to the Python path when needed
 # This approach allows imports to work both when imported as a module and when run directly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from models.user import User
+from repositories.user_repository import USER_COLUMNS, user_cache
+from utils.executor import iterate_blocking, run_blocking
 
 app = FastAPI()
 
@@ -32,9 +36,43 @@ class UserUpdate(BaseModel):
 async def root():
     return {"message": "Welcome to the Crypto Portfolio API"}
 
+@app.get("/stats")
+async def get_user_cache_stats():
+    return {"user_cache": user_cache.get_stats()}
+
+def parse_fields(fields):
+    # Comma separated column names, defaulting to every user column
+    if not fields:
+        return USER_COLUMNS
+    columns = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [column for column in columns if column not in USER_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return columns
+
+@app.get("/users")
+async def list_users(after: Optional[int] = Query(None, description="Return users with an id greater than this cursor"), limit: int = Query(100, ge=1, le=1000, description="Page size"), fields: Optional[str] = Query(None, description="Comma separated columns to return (e.g., 'id,name')")):
+    columns = parse_fields(fields)
+    users = await run_blocking(User.fetch_users_page, after, limit, columns)
+    if users is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch users")
+    next_cursor = users[-1]["id"] if len(users) == limit else None
+    return {"users": users, "next_cursor": next_cursor}
+
+@app.get("/users/stream")
+async def stream_users(fields: Optional[str] = Query(None, description="Comma separated columns to return (e.g., 'id,name')"), page_size: int = Query(1000, ge=1, le=10000, description="Users fetched per round trip")):
+    columns = parse_fields(fields)
+    
+    async def ndjson_lines():
+        # Each page is a database round trip, so fetch them on the blocking executor
+        async for page in iterate_blocking(User.iter_all_users(page_size, columns)):
+            yield "".join(json.dumps(user) + "\n" for user in page)
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @app.post("/create", response_model=UserResponse)
 async def create_user(user: UserCreate):
-    created_user = User.create_user(user.name, user.email, user.age)
+    created_user = await run_blocking(User.create_user, user.name, user.email, user.age)
     if created_user:
         return UserResponse(
             id=created_user.id,
@@ -47,7 +85,7 @@ async def create_user(user: UserCreate):
 
 @app.get("/{user_name}/name", response_model=UserResponse)
 async def get_user_by_name(user_name):
-    user = User.fetch_user_by_name(user_name)
+    user = await run_blocking(User.fetch_user_by_name, user_name)
     if user:
         return UserResponse(
             id=user.id,
@@ -59,7 +97,7 @@ async def get_user_by_name(user_name):
 
 @app.get("/{user_name}/email", response_model=UserResponse)
 async def get_user_by_email(user_email):
-    user = User.find_user_by_email(user_email)
+    user = await run_blocking(User.find_user_by_email, user_email)
     if user:
         return UserResponse(
             id=user.id,
@@ -72,12 +110,12 @@ async def get_user_by_email(user_email):
 @app.put("/{user_name}/update")
 async def update_user(user_name: str, user_update: UserUpdate):
     # First fetch the user by name
-    user = User.fetch_user_by_name(user_name)
+    user = await run_blocking(User.fetch_user_by_name, user_name)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Then call the instance method to update the user
-    result = user.update_user(user_update.param, user_update.new_value)
+    result = await run_blocking(user.update_user, user_update.param, user_update.new_value)
     if not result:
         raise HTTPException(status_code=400, detail="Failed to update user")
     # Update the local user object with the new value
@@ -92,10 +130,10 @@ async def update_user(user_name: str, user_update: UserUpdate):
 
 @app.delete("/{user_name}/delete")
 async def delete_user(user_name: str):
-    user = User.fetch_user_by_name(user_name)
+    user = await run_blocking(User.fetch_user_by_name, user_name)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    result = user.delete()
+    result = await run_blocking(user.delete)
     if result:
         return {"message": f"User {user_name} successfully deleted"}
     else:
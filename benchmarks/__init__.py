@@ -0,0 +1,6 @@
+import os
+
+# Benchmarks never talk to Supabase. Selecting SQLite before database.db is imported
+# keeps it from creating a Supabase client; the stand-ins then swap in their own database.
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
@@ -0,0 +1,427 @@
+"""HTTP load generator for the crypto, portfolio, analytics and users apps.
+
+Drives the four FastAPI apps with a workload profile while the upstream stand-ins from
+benchmarks.stand_ins replace CoinGecko, yfinance and Supabase, then reports throughput
+and p50/p95/p99 latency per route.
+
+Requests go either straight into the apps in-process (no sockets, measures the app
+alone) or over localhost to uvicorn servers started for each app (includes HTTP
+parsing and the event loop). Load is applied either by a fixed number of concurrent
+clients that send back to back, or at a fixed request rate. In rate mode latency is
+measured from the moment a request was due, so a saturated server shows up as rising
+latency instead of silently lowering the offered load.
+
+Usage:
+    python -m benchmarks.loadtest --profile valuation --concurrency 32 --duration 20
+    python -m benchmarks.loadtest --profile analytics --rate 50 --duration 30
+    python -m benchmarks.loadtest --profile writes --transport localhost --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import uvicorn
+
+from benchmarks import stand_ins
+from benchmarks.suite import holding_symbols, seed_database
+from api.routes import analytics_routes, crypto_routes, portfolio_routes, users_routes
+
+APPS = {
+    "crypto": crypto_routes.app,
+    "portfolio": portfolio_routes.app,
+    "analytics": analytics_routes.app,
+    "users": users_routes.app
+}
+# First port used by --transport localhost, one port per app in APPS order
+BASE_PORT = 8100
+# Seconds LocalServers.start waits for every server to accept connections
+SERVER_STARTUP_TIMEOUT = 10.0
+# Seeded portfolios the profiles read and write, see benchmarks.suite.seed_database
+PORTFOLIO_USERS = ["bench_1", "bench_10", "bench_100"]
+SYMBOLS = holding_symbols(100)
+BUNDLE = [
+    {"name": "rolling_mean", "window": 20},
+    {"name": "volatility", "window": 30},
+    {"name": "sharpe_ratio"}
+]
+
+
+def valuation_request(rng):
+    return "portfolio", "GET", f"/users/{rng.choice(PORTFOLIO_USERS)}/valuation", "/users/{user}/valuation", None
+
+
+def holdings_request(rng):
+    return "portfolio", "GET", f"/users/{rng.choice(PORTFOLIO_USERS)}/assets", "/users/{user}/assets", None
+
+
+def price_request(rng):
+    return "crypto", "GET", f"/assets/{rng.choice(SYMBOLS)}/price", "/assets/{asset}/price", None
+
+
+def user_request(rng):
+    return "users", "GET", f"/filler_{rng.randrange(1000)}/name", "/{user}/name", None
+
+
+def users_page_request(rng):
+    return "users", "GET", f"/users?after={rng.randrange(1000)}&limit=100", "/users", None
+
+
+def rolling_mean_request(rng):
+    period = rng.choice(["1mo", "6mo", "1y", "5y"])
+    path = f"/analytics/{rng.choice(SYMBOLS[:20])}/rolling_mean?window=20&period={period}"
+    return "analytics", "GET", path, "/analytics/{asset}/rolling_mean", None
+
+
+def volatility_request(rng):
+    path = f"/analytics/{rng.choice(SYMBOLS[:20])}/volatility?period=1y&window=30"
+    return "analytics", "GET", path, "/analytics/{asset}/volatility", None
+
+
+def bundle_request(rng):
+    body = {"period": "1y", "indicators": BUNDLE}
+    return "analytics", "POST", f"/analytics/{rng.choice(SYMBOLS[:20])}/bundle", "/analytics/{asset}/bundle", body
+
+
+def batch_request(rng):
+    body = {"symbols": rng.sample(SYMBOLS[:20], 5), "period": "1y", "indicators": BUNDLE}
+    return "analytics", "POST", "/analytics/batch", "/analytics/batch", body
+
+
+def risk_request(rng):
+    return "analytics", "GET", "/analytics/users/bench_10/risk?period=1y", "/analytics/users/{user}/risk", None
+
+
+def bulk_write_request(rng):
+    body = {"assets": [{"asset": symbol, "quantity": 0.5} for symbol in rng.sample(SYMBOLS, rng.randint(10, 50))]}
+    return "portfolio", "POST", f"/users/{rng.choice(PORTFOLIO_USERS)}/assets/bulk", "/users/{user}/assets/bulk", body
+
+
+def add_asset_request(rng):
+    body = {"asset": rng.choice(SYMBOLS), "quantity": 1}
+    return "portfolio", "POST", f"/users/{rng.choice(PORTFOLIO_USERS)}/assets", "/users/{user}/assets", body
+
+
+def remove_asset_request(rng):
+    # bench_1 only holds btc; the other users hold all of SYMBOLS[:10] with balances far above this
+    user = rng.choice(PORTFOLIO_USERS[1:])
+    path = f"/users/{user}/assets/{rng.choice(SYMBOLS[:10])}?quantity=0.01"
+    return "portfolio", "DELETE", path, "/users/{user}/assets/{asset}", None
+
+
+def create_user_request(rng):
+    name = f"load_{rng.getrandbits(48):012x}"
+    body = {"name": name, "email": f"{name}@example.com", "age": 30}
+    return "users", "POST", "/create", "/create", body
+
+
+# Workload profiles: weighted request generators, plus how many requests arrive
+# together in rate mode (analytics traffic comes in bursts from dashboards)
+PROFILES = {
+    "valuation": {
+        "burst": 1,
+        "requests": [
+            (60, valuation_request),
+            (15, holdings_request),
+            (15, price_request),
+            (10, user_request)
+        ]
+    },
+    "analytics": {
+        "burst": 10,
+        "requests": [
+            (40, rolling_mean_request),
+            (20, volatility_request),
+            (20, bundle_request),
+            (10, batch_request),
+            (10, risk_request)
+        ]
+    },
+    "writes": {
+        "burst": 1,
+        "requests": [
+            (50, bulk_write_request),
+            (20, add_asset_request),
+            (15, remove_asset_request),
+            (5, create_user_request),
+            (10, valuation_request)
+        ]
+    },
+    "mixed": {
+        "burst": 1,
+        "requests": [
+            (35, valuation_request),
+            (10, holdings_request),
+            (10, price_request),
+            (10, user_request),
+            (5, users_page_request),
+            (10, rolling_mean_request),
+            (5, bundle_request),
+            (10, bulk_write_request),
+            (5, add_asset_request)
+        ]
+    }
+}
+
+
+class Recorder:
+    """Collects the latency and outcome of every request, grouped by route."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, ok):
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    @staticmethod
+    def percentile(ordered, fraction):
+        """Return the nearest-rank percentile of an already sorted list."""
+        index = max(0, math.ceil(fraction * len(ordered)) - 1)
+        return ordered[index]
+
+    def summary(self, elapsed):
+        """Summarize throughput and latency per route and overall.
+
+        Args:
+            elapsed (float): Seconds the load ran for
+
+        Returns:
+            dict: Route (and 'total') mapped to requests, errors, throughput and
+                p50/p95/p99/max latency in milliseconds
+        """
+        routes = dict(self.latencies)
+        routes["total"] = [seconds for latencies in self.latencies.values() for seconds in latencies]
+        summary = {}
+        for route, latencies in routes.items():
+            if not latencies:
+                continue
+            ordered = sorted(latencies)
+            errors = sum(self.errors.values()) if route == "total" else self.errors[route]
+            summary[route] = {
+                "requests": len(ordered),
+                "errors": errors,
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(self.percentile(ordered, 0.50) * 1000, 2),
+                "p95_ms": round(self.percentile(ordered, 0.95) * 1000, 2),
+                "p99_ms": round(self.percentile(ordered, 0.99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2)
+            }
+        return summary
+
+
+class LoadGenerator:
+    """Sends a profile's requests to the apps and records the results."""
+
+    def __init__(self, clients, profile, seed=0):
+        """Initialize the generator.
+
+        Args:
+            clients (dict): App name mapped to an httpx.AsyncClient for that app
+            profile (dict): Entry of PROFILES
+            seed (int): Seed for the request mix, so runs are repeatable
+        """
+        self.clients = clients
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.weights = [weight for weight, _ in profile["requests"]]
+        self.generators = [generator for _, generator in profile["requests"]]
+        self.recorder = Recorder()
+
+    def next_request(self):
+        return self.rng.choices(self.generators, self.weights)[0](self.rng)
+
+    async def send(self, request, due=None):
+        """Send one request and record its latency, from `due` if given.
+
+        Args:
+            request (tuple): (app, method, path, route, json body) from a request generator
+            due (float, optional): time.perf_counter() value the request was scheduled for
+        """
+        app, method, path, route, body = request
+        start = due if due is not None else time.perf_counter()
+        try:
+            response = await self.clients[app].request(method, path, json=body)
+            ok = response.status_code < 400
+        except Exception as e:
+            print(f"Error sending {method} {path}: {str(e)}")
+            ok = False
+        self.recorder.record(f"{method} {app} {route}", time.perf_counter() - start, ok)
+
+    async def run_concurrency(self, concurrency, duration):
+        """Keep `concurrency` requests in flight, each client sending back to back."""
+        deadline = time.perf_counter() + duration
+
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                await self.send(self.next_request())
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    async def run_rate(self, rate, duration, burst):
+        """Start `rate` requests per second regardless of how fast they complete.
+
+        Requests are released `burst` at a time every burst / rate seconds.
+        """
+        start = time.perf_counter()
+        interval = burst / rate
+        in_flight = set()
+        tick = 0
+        while True:
+            due = start + tick * interval
+            if due - start >= duration:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            for _ in range(burst):
+                task = asyncio.create_task(self.send(self.next_request(), due))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            tick += 1
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+
+class LocalServers:
+    """Runs each app under uvicorn on its own localhost port, in background threads."""
+
+    def __init__(self, base_port=BASE_PORT):
+        self.servers = {}
+        for offset, (name, app) in enumerate(APPS.items()):
+            config = uvicorn.Config(app, host="127.0.0.1", port=base_port + offset, log_level="warning")
+            self.servers[name] = uvicorn.Server(config)
+        self.threads = []
+
+    def base_urls(self):
+        return {name: f"http://127.0.0.1:{server.config.port}" for name, server in self.servers.items()}
+
+    def start(self, timeout=SERVER_STARTUP_TIMEOUT):
+        """Start every server and wait until all of them accept connections.
+
+        Raises:
+            RuntimeError: If a server thread dies (e.g. its port is taken) or the
+                servers are not up within timeout seconds; the others are stopped
+        """
+        threads = {}
+        for name, server in self.servers.items():
+            threads[name] = threading.Thread(target=server.run, daemon=True)
+            threads[name].start()
+            self.threads.append(threads[name])
+        deadline = time.monotonic() + timeout
+        while not all(server.started for server in self.servers.values()):
+            for name, server in self.servers.items():
+                if not server.started and not threads[name].is_alive():
+                    self.stop()
+                    raise RuntimeError(f"{name} server on port {server.config.port} exited before starting, is the port in use?")
+            if time.monotonic() > deadline:
+                waiting = [f"{name} (port {server.config.port})" for name, server in self.servers.items() if not server.started]
+                self.stop()
+                raise RuntimeError(f"Servers not started after {timeout}s: {', '.join(waiting)}")
+            time.sleep(0.05)
+
+    def stop(self):
+        for server in self.servers.values():
+            server.should_exit = True
+        for thread in self.threads:
+            thread.join()
+
+
+async def run_load(args):
+    """Open clients for the chosen transport, apply the load and return the summary."""
+    profile = PROFILES[args.profile]
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if args.transport == "inprocess":
+        clients = {
+            name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", limits=limits)
+            for name, app in APPS.items()
+        }
+        lifespans = [app.router.lifespan_context(app) for app in APPS.values()]
+    else:
+        clients = {
+            name: httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout)
+            for name, url in args.base_urls.items()
+        }
+        lifespans = []
+
+    for lifespan in lifespans:
+        await lifespan.__aenter__()
+    try:
+        generator = LoadGenerator(clients, profile, args.seed)
+        start = time.perf_counter()
+        if args.rate:
+            await generator.run_rate(args.rate, args.duration, args.burst or profile["burst"])
+        else:
+            await generator.run_concurrency(args.concurrency, args.duration)
+        elapsed = time.perf_counter() - start
+    finally:
+        for lifespan in reversed(lifespans):
+            await lifespan.__aexit__(None, None, None)
+        for client in clients.values():
+            await client.aclose()
+    return generator.recorder.summary(elapsed)
+
+
+def print_summary(summary):
+    print(f"{'route':<48} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route in sorted(summary, key=lambda route: (route == "total", route)):
+        result = summary[route]
+        print(
+            f"{route:<48} {result['requests']:>9} {result['errors']:>7} {result['throughput_rps']:>9.1f}"
+            f" {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['max_ms']:>9.2f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the FastAPI apps against the upstream stand-ins")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed", help="Workload profile")
+    parser.add_argument("--transport", choices=["inprocess", "localhost"], default="inprocess",
+                        help="Call the apps in-process or through uvicorn on localhost")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (ignored with --rate)")
+    parser.add_argument("--rate", type=float, help="Fixed request rate per second instead of fixed concurrency")
+    parser.add_argument("--burst", type=int, help="Requests released together in rate mode (defaults to the profile's)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to apply load for")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the request mix")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds for localhost")
+    parser.add_argument("--coingecko-latency-ms", type=float, default=0.0, help="Latency added to every CoinGecko request")
+    parser.add_argument("--yfinance-latency-ms", type=float, default=0.0, help="Latency added to every yfinance request")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Latency added to every storage call")
+    parser.add_argument("--output", help="Also write the summary as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with stand_ins.install(
+        coingecko_latency=args.coingecko_latency_ms / 1000,
+        yfinance_latency=args.yfinance_latency_ms / 1000,
+        storage_latency=args.storage_latency_ms / 1000
+    ) as env:
+        seed_database(env.storage.storage)
+        servers = None
+        if args.transport == "localhost":
+            servers = LocalServers()
+            servers.start()
+            args.base_urls = servers.base_urls()
+        try:
+            summary = asyncio.run(run_load(args))
+        finally:
+            if servers is not None:
+                servers.stop()
+        upstream_calls = env.calls.snapshot()
+
+    print_summary(summary)
+    print(f"Upstream calls: {', '.join(f'{key}={count}' for key, count in upstream_calls.items()) or '-'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "routes": summary, "upstream_calls": upstream_calls}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
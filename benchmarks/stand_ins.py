@@ -0,0 +1,306 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+from database import db
+from database.sqlite_backend import SQLiteStorage
+from models.crypto_asset import FetchAPI, price_cache
+from repositories import history_repository
+from repositories.history_repository import HistoryRepository
+from repositories.user_repository import user_cache
+
+# Recorded CoinGecko responses replayed by the stand-in
+RECORDING_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "coingecko.json")
+# First bar served by the yfinance stand-in, answers period='max'
+HISTORY_START = pd.Timestamp("2014-09-17", tz="UTC")
+COINGECKO_URL = "https://api.coingecko.com"
+
+
+class CallCounter:
+    """Thread-safe count of upstream calls, keyed like 'coingecko:simple/price'."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        """Count one call."""
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self):
+        """Return the counts so far as a plain sorted dictionary."""
+        with self._lock:
+            return dict(sorted(self._counts.items()))
+
+    def clear(self):
+        """Zero every count."""
+        with self._lock:
+            self._counts.clear()
+
+
+def symbol_seed(symbol):
+    """Return a stable integer seed for a symbol, so generated data never changes."""
+    return zlib.crc32(symbol.encode())
+
+
+class CoinGeckoStandIn(HTTPAdapter):
+    """Transport adapter answering CoinGecko requests from recorded responses.
+
+    Mounted on FetchAPI's shared session, so the whole requests stack (headers,
+    JSON decoding, single-flight, latency stats) runs as in production and only
+    the network is replaced. Symbols missing from the recording get deterministic
+    generated data in the same shape.
+    """
+
+    def __init__(self, calls, latency=0.0, recording_path=RECORDING_PATH):
+        """Load the recording.
+
+        Args:
+            calls (CallCounter): Upstream call counts, incremented per request
+            latency (float): Seconds to sleep per request
+            recording_path (str): JSON file with 'simple/price' and 'coins/markets' responses
+        """
+        super().__init__()
+        self.calls = calls
+        self.latency = latency
+        with open(recording_path) as f:
+            recording = json.load(f)
+        self.prices = recording["simple/price"]
+        self.markets = {entry["symbol"]: entry for entry in recording["coins/markets"]}
+
+    def price(self, symbol):
+        """Return the recorded or generated USD price of a symbol."""
+        if symbol in self.prices:
+            return self.prices[symbol]["usd"]
+        return round(1 + symbol_seed(symbol) % 100000 / 100, 2)
+
+    def market(self, symbol):
+        """Return the recorded or generated ``coins/markets`` entry of a symbol."""
+        if symbol in self.markets:
+            return self.markets[symbol]
+        price = self.price(symbol)
+        supply = 1000000 + symbol_seed(symbol) % 1000000000
+        return {
+            "id": symbol,
+            "symbol": symbol,
+            "name": symbol.upper(),
+            "current_price": price,
+            "market_cap": round(price * supply),
+            "total_volume": round(price * supply / 20),
+            "max_supply": supply
+        }
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        # Like CoinGecko, symbols are matched and answered in lowercase
+        symbols = [symbol.lower() for symbol in parse_qs(url.query).get("symbols", [""])[0].split(",") if symbol]
+        if url.path.rstrip("/").endswith("/simple/price"):
+            endpoint, body, status = "simple/price", {symbol: {"usd": self.price(symbol)} for symbol in symbols}, 200
+        elif url.path.rstrip("/").endswith("/coins/markets"):
+            endpoint, body, status = "coins/markets", [self.market(symbol) for symbol in symbols], 200
+        else:
+            endpoint, body, status = "unknown", {"error": "Not found"}, 404
+        self.calls.record(f"coingecko:{endpoint}")
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class YFinanceStandIn:
+    """Replacement for yf.Ticker and yf.download serving generated daily OHLCV bars.
+
+    Each symbol's bars are a seeded random walk from HISTORY_START to today, so every
+    run sees the same prices. Only the periods and arguments this repo uses are supported.
+    """
+
+    def __init__(self, calls, latency=0.0):
+        """Initialize the stand-in.
+
+        Args:
+            calls (CallCounter): Upstream call counts, incremented per request
+            latency (float): Seconds to sleep per request
+        """
+        self.calls = calls
+        self.latency = latency
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def bars(self, symbol):
+        """Return every generated bar of a symbol, generating them on first use."""
+        # yfinance tickers are case-insensitive
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol not in self._bars:
+                index = pd.date_range(HISTORY_START, pd.Timestamp.now(tz="UTC").normalize(), freq="D", name="Date")
+                rng = np.random.default_rng(symbol_seed(symbol))
+                close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.03, len(index))))
+                open_ = close * np.exp(rng.normal(0, 0.01, len(index)))
+                self._bars[symbol] = pd.DataFrame({
+                    "Open": open_,
+                    "High": np.maximum(open_, close) * 1.01,
+                    "Low": np.minimum(open_, close) * 0.99,
+                    "Close": close,
+                    "Volume": rng.integers(10 ** 6, 10 ** 9, len(index)).astype(float),
+                    "Dividends": 0.0,
+                    "Stock Splits": 0.0
+                }, index=index)
+            return self._bars[symbol]
+
+    def history(self, symbol, period=None, interval="1d", start=None):
+        """Answer yf.Ticker(symbol).history(period=...) or history(start=...)."""
+        self.calls.record("yfinance:history")
+        if self.latency:
+            time.sleep(self.latency)
+        bars = self.bars(symbol)
+        if start is not None:
+            first = pd.Timestamp(start, tz="UTC")
+        else:
+            first = HistoryRepository.period_start(period or "1mo", bars.index[-1])
+        return bars.copy() if first is None else bars[bars.index >= first].copy()
+
+    def download(self, tickers, period="1mo", group_by="column", progress=True, **kwargs):
+        """Answer yf.download(tickers=[...], period=..., group_by='column').
+
+        Like yfinance, columns are named by the upper-cased, de-duplicated tickers.
+        """
+        self.calls.record("yfinance:download")
+        if self.latency:
+            time.sleep(self.latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        tickers = list(dict.fromkeys(symbol.upper() for symbol in tickers))
+        frames = {}
+        for symbol in tickers:
+            bars = self.bars(symbol)
+            first = HistoryRepository.period_start(period, bars.index[-1])
+            frames[symbol] = bars if first is None else bars[bars.index >= first]
+        fields = ["Close", "High", "Low", "Open", "Volume"]
+        return pd.concat(
+            {field: pd.DataFrame({symbol: frames[symbol][field] for symbol in tickers}) for field in fields},
+            axis=1
+        )
+
+    def ticker(self, symbol):
+        """Return an object with the history() method of yf.Ticker."""
+        stand_in = self
+
+        class Ticker:
+            def history(self, period=None, interval="1d", start=None, **kwargs):
+                return stand_in.history(symbol, period, interval, start)
+
+        return Ticker()
+
+
+class CountingStorage:
+    """Storage proxy that counts every backend call and optionally adds latency to it."""
+
+    def __init__(self, storage, calls, latency=0.0):
+        """Wrap a storage backend.
+
+        Args:
+            storage (Storage): Backend to forward calls to
+            calls (CallCounter): Upstream call counts, incremented per call
+            latency (float): Seconds to sleep per call
+        """
+        self.storage = storage
+        self.calls = calls
+        self.latency = latency
+
+    def __getattr__(self, name):
+        method = getattr(self.storage, name)
+
+        def counted(*args, **kwargs):
+            self.calls.record(f"storage:{name}")
+            if self.latency:
+                time.sleep(self.latency)
+            return method(*args, **kwargs)
+
+        return counted
+
+
+class StandIns:
+    """Handle returned by install(): upstream call counts and helpers to reset state."""
+
+    def __init__(self, calls, storage, coingecko, yfinance):
+        self.calls = calls
+        self.storage = storage
+        self.coingecko = coingecko
+        self.yfinance = yfinance
+
+    def reset_counts(self):
+        """Zero the upstream call counters."""
+        self.calls.clear()
+
+    def clear_caches(self):
+        """Empty the price, user and history caches so the next call is cold."""
+        price_cache.clear()
+        user_cache.clear()
+        HistoryRepository._frames.clear()
+        HistoryRepository._meta.clear()
+        for name in os.listdir(history_repository.HISTORY_DIR):
+            os.remove(os.path.join(history_repository.HISTORY_DIR, name))
+
+
+@contextmanager
+def install(coingecko_latency=0.0, yfinance_latency=0.0, storage_latency=0.0, recording_path=RECORDING_PATH):
+    """Replace CoinGecko, yfinance and Supabase with local deterministic stand-ins.
+
+    CoinGecko requests are answered by CoinGeckoStandIn mounted on FetchAPI's shared
+    session, yf.Ticker and yf.download are swapped for YFinanceStandIn, db.storage
+    becomes a fresh in-memory SQLite database, and the history store writes to a
+    temporary directory. Everything is restored on exit.
+
+    Args:
+        coingecko_latency (float): Seconds added to every CoinGecko request
+        yfinance_latency (float): Seconds added to every yfinance request
+        storage_latency (float): Seconds added to every storage call
+        recording_path (str): Recorded CoinGecko responses to replay
+
+    Yields:
+        StandIns: Call counts, the counting storage and the stand-ins themselves
+    """
+    calls = CallCounter()
+    coingecko = CoinGeckoStandIn(calls, coingecko_latency, recording_path)
+    yfinance = YFinanceStandIn(calls, yfinance_latency)
+    storage = CountingStorage(SQLiteStorage(":memory:"), calls, storage_latency)
+
+    session = FetchAPI.get_session()
+    saved_adapters = dict(session.adapters)
+    saved = (yf.Ticker, yf.download, db.storage, history_repository.HISTORY_DIR)
+    history_dir = tempfile.TemporaryDirectory(prefix="bench-history-")
+
+    session.mount(COINGECKO_URL, coingecko)
+    yf.Ticker, yf.download = yfinance.ticker, yfinance.download
+    db.storage = storage
+    history_repository.HISTORY_DIR = history_dir.name
+    stand_ins = StandIns(calls, storage, coingecko, yfinance)
+    stand_ins.clear_caches()
+    try:
+        yield stand_ins
+    finally:
+        # Drop cached data served by the stand-ins before the real sources come back
+        stand_ins.clear_caches()
+        session.adapters.clear()
+        session.adapters.update(saved_adapters)
+        yf.Ticker, yf.download, db.storage, history_repository.HISTORY_DIR = saved
+        history_dir.cleanup()
@@ -0,0 +1,338 @@
+"""Benchmark suite for the valuation, analytics and repository hot paths.
+
+Runs every case against the local stand-ins from benchmarks.stand_ins and reports
+wall time, upstream call counts and peak traced allocations. Results can be saved
+as a baseline and later runs compared against it.
+
+Usage:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --filter valuation --repeat 10
+    python -m benchmarks.suite --coingecko-latency-ms 50 --yfinance-latency-ms 200
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --compare
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+from benchmarks import stand_ins
+from api.routes import portfolio_routes
+from models.portfolio import Portfolio
+from repositories.history_repository import HistoryRepository
+from repositories.portfolio_repository import PortfolioRepository
+from repositories.user_repository import UserRepository
+from services.analytics import Analytics
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+PORTFOLIO_SIZES = [1, 10, 100, 1000]
+RISK_SIZES = [2, 10, 100]
+PERIODS = ["1mo", "3mo", "6mo", "1y", "2y", "5y", "max"]
+# Extra users so user lookups and pagination run against a realistically sized table
+FILLER_USERS = 2000
+
+
+def holding_symbols(count):
+    """Return count distinct symbols, the recorded ones first."""
+    recorded = ["btc", "eth", "usdt", "bnb", "sol", "xrp", "usdc", "ada", "doge", "dot"]
+    return (recorded + [f"coin{i:04d}" for i in range(max(0, count - len(recorded)))])[:count]
+
+
+def seed_database(storage):
+    """Create one user per portfolio size, plus filler users, directly in storage.
+
+    Args:
+        storage (Storage): Backend to seed
+
+    Returns:
+        dict: Portfolio size mapped to the name of the user holding that many assets
+    """
+    users = {}
+    for size in sorted(set(PORTFOLIO_SIZES + RISK_SIZES)):
+        user = storage.insert_user(f"bench_{size}", f"bench_{size}@example.com", 30)
+        storage.apply_asset_deltas(
+            user["id"],
+            [{"asset": symbol, "quantity": 1 + i % 7} for i, symbol in enumerate(holding_symbols(size))]
+        )
+        users[size] = user["name"]
+    for i in range(FILLER_USERS):
+        storage.insert_user(f"filler_{i}", f"filler_{i}@example.com", 20 + i % 50)
+    return users
+
+
+class Case:
+    """One benchmark: a setup run before every measurement and the timed call."""
+
+    def __init__(self, name, run, setup=None):
+        """Define a case.
+
+        Args:
+            name (str): Case name, e.g. 'valuation.total_portfolio_valuation[cold,n=100]'
+            run (callable): Zero-argument function being measured
+            setup (callable, optional): Zero-argument function run before every measurement
+        """
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def build_cases(env, users, client):
+    """Build every benchmark case.
+
+    Args:
+        env (StandIns): Installed stand-ins
+        users (dict): Portfolio size mapped to user name, from seed_database
+        client (TestClient): Client for the portfolio routes app
+
+    Returns:
+        list: Case objects
+    """
+    analytics = Analytics()
+    cases = []
+
+    def warm_history(symbol, period):
+        # Store the bars once so only the indicator math is measured
+        return lambda: HistoryRepository.get_history(symbol, period)
+
+    for size in PORTFOLIO_SIZES:
+        name = users[size]
+        cases.append(Case(
+            f"valuation.total_portfolio_valuation[cold,n={size}]",
+            lambda name=name: Portfolio.from_user_name(name).total_portfolio_valuation(),
+            env.clear_caches
+        ))
+        cases.append(Case(
+            f"valuation.total_portfolio_valuation[warm,n={size}]",
+            lambda name=name: Portfolio.from_user_name(name).total_portfolio_valuation(),
+            lambda name=name: Portfolio.from_user_name(name).total_portfolio_valuation()
+        ))
+        cases.append(Case(
+            f"route.valuation[cold,n={size}]",
+            lambda name=name: client.get(f"/users/{name}/valuation").raise_for_status(),
+            env.clear_caches
+        ))
+
+    for period in PERIODS:
+        cases.append(Case(
+            f"history.get_history[cold,period={period}]",
+            lambda period=period: HistoryRepository.get_history("btc", period),
+            env.clear_caches
+        ))
+        cases.append(Case(
+            f"analytics.rolling_mean[period={period}]",
+            lambda period=period: analytics.rolling_mean("btc", 20, period),
+            warm_history("btc", period)
+        ))
+        cases.append(Case(
+            f"analytics.moving_volume[period={period}]",
+            lambda period=period: analytics.moving_volume("btc", 20, period),
+            warm_history("btc", period)
+        ))
+        cases.append(Case(
+            f"analytics.calculate_volatility[period={period}]",
+            lambda period=period: analytics.calculate_volatility("btc", period, 30),
+            warm_history("btc", period)
+        ))
+        cases.append(Case(
+            f"analytics.calculate_sharpe_ratio[period={period}]",
+            lambda period=period: analytics.calculate_sharpe_ratio("btc", 0.02, period),
+            warm_history("btc", period)
+        ))
+        cases.append(Case(
+            f"analytics.indicator_bundle[period={period}]",
+            lambda period=period: analytics.indicator_bundle(
+                "btc",
+                [
+                    {"name": "rolling_mean", "window": 20},
+                    {"name": "moving_volume", "window": 20},
+                    {"name": "volatility", "window": 30},
+                    {"name": "sharpe_ratio"}
+                ],
+                period
+            ),
+            warm_history("btc", period)
+        ))
+
+    for size in RISK_SIZES:
+        holdings = [{"asset": symbol, "quantity": 1} for symbol in holding_symbols(size)]
+        cases.append(Case(
+            f"analytics.portfolio_risk[period=1y,n={size}]",
+            lambda holdings=holdings: analytics.portfolio_risk(holdings, 0.02, "1y")
+        ))
+
+    for size in PORTFOLIO_SIZES:
+        name = users[size]
+        cases.append(Case(
+            f"repository.fetch_user_with_assets[n={size}]",
+            lambda name=name: PortfolioRepository.fetch_user_with_assets(name)
+        ))
+        user_id = PortfolioRepository.fetch_user_with_assets(name)["id"]
+        deltas = [{"asset": symbol, "quantity": 1} for symbol in holding_symbols(size)]
+        cases.append(Case(
+            f"repository.apply_asset_deltas[n={size}]",
+            lambda user_id=user_id, deltas=deltas: PortfolioRepository.apply_asset_deltas(user_id, deltas)
+        ))
+
+    lookups = [f"filler_{i}" for i in range(0, FILLER_USERS, FILLER_USERS // 100)]
+    cases.append(Case(
+        "repository.fetch_users[cold,lookups=100]",
+        lambda: [UserRepository.fetch_users(name) for name in lookups],
+        env.clear_caches
+    ))
+    cases.append(Case(
+        "repository.fetch_users[warm,lookups=100]",
+        lambda: [UserRepository.fetch_users(name) for name in lookups],
+        lambda: [UserRepository.fetch_users(name) for name in lookups]
+    ))
+    cases.append(Case(
+        "repository.iter_users[page_size=500]",
+        lambda: sum(len(page) for page in UserRepository.iter_users(500))
+    ))
+    return cases
+
+
+def measure(case, env, repeat):
+    """Run a case repeat times plus one warm-up and one traced run.
+
+    Args:
+        case (Case): Case to run
+        env (StandIns): Installed stand-ins, used to count upstream calls
+        repeat (int): Number of timed runs
+
+    Returns:
+        dict: Median and min wall time in ms, upstream calls of one run and peak KiB allocated
+    """
+    case.setup()
+    case.run()
+
+    timings = []
+    for _ in range(repeat):
+        case.setup()
+        env.reset_counts()
+        start = time.perf_counter()
+        case.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    calls = env.calls.snapshot()
+
+    # Allocation tracing slows everything down, so it gets a run of its own
+    case.setup()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "calls": calls,
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.5):
+    """Compare results with a baseline.
+
+    Wall time (the fastest run, which is the least noisy) and allocations regress when
+    they exceed the baseline by more than tolerance, and wall time also by more than
+    min_delta_ms. Upstream calls regress on any increase, since they are deterministic.
+
+    Args:
+        results (dict): Case name mapped to measure() output
+        baseline (dict): Case name mapped to measure() output
+        tolerance (float): Allowed relative increase, e.g. 0.25 for 25%
+        min_delta_ms (float): Slowdowns smaller than this are treated as noise
+
+    Returns:
+        list: Human readable regression descriptions, empty if none
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if (result["min_ms"] > previous["min_ms"] * (1 + tolerance)
+                and result["min_ms"] - previous["min_ms"] > min_delta_ms):
+            regressions.append(f"{name}: min_ms {previous['min_ms']} -> {result['min_ms']}")
+        if result["peak_kib"] > previous["peak_kib"] * (1 + tolerance):
+            regressions.append(f"{name}: peak_kib {previous['peak_kib']} -> {result['peak_kib']}")
+        for key in set(result["calls"]) | set(previous["calls"]):
+            before, after = previous["calls"].get(key, 0), result["calls"].get(key, 0)
+            if after > before:
+                regressions.append(f"{name}: {key} calls {before} -> {after}")
+    return regressions
+
+
+def format_calls(calls):
+    return ", ".join(f"{key}={count}" for key, count in calls.items()) or "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the valuation, analytics and repository hot paths")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--coingecko-latency-ms", type=float, default=0.0, help="Latency added to every CoinGecko request")
+    parser.add_argument("--yfinance-latency-ms", type=float, default=0.0, help="Latency added to every yfinance request")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Latency added to every storage call")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to save to or compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown or growth in allocations")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    config = {
+        "repeat": args.repeat,
+        "coingecko_latency_ms": args.coingecko_latency_ms,
+        "yfinance_latency_ms": args.yfinance_latency_ms,
+        "storage_latency_ms": args.storage_latency_ms
+    }
+    results = {}
+    with stand_ins.install(
+        coingecko_latency=args.coingecko_latency_ms / 1000,
+        yfinance_latency=args.yfinance_latency_ms / 1000,
+        storage_latency=args.storage_latency_ms / 1000
+    ) as env, TestClient(portfolio_routes.app) as client:
+        users = seed_database(env.storage.storage)
+        for case in build_cases(env, users, client):
+            if args.filter not in case.name:
+                continue
+            results[case.name] = measure(case, env, args.repeat)
+            result = results[case.name]
+            print(
+                f"{case.name:<58} {result['median_ms']:>10.2f} ms {result['min_ms']:>10.2f} ms (min)"
+                f" {result['peak_kib']:>10.1f} KiB  {format_calls(result['calls'])}"
+            )
+
+    report = {"config": config, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            print(f"Warning: baseline was recorded with {baseline['config']}, this run used {config}")
+        regressions = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,27 @@
 import os
-from supabase import create_client, Client
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+
+# Which storage backend the repositories use: "supabase" (default) or "sqlite"
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase")
+
+
+def create_storage(backend=STORAGE_BACKEND):
+    """Create the storage backend selected by name.
+
+    Args:
+        backend (str): "supabase" or "sqlite"
+
+    Returns:
+        Storage: Backend instance used by the repositories
+    """
+    if backend == "supabase":
+        from database.supabase_backend import SupabaseStorage
+        url: str = os.environ.get("SUPABASE_URL")
+        key: str = os.environ.get("SUPABASE_KEY")
+        return SupabaseStorage(url, key)
+    if backend == "sqlite":
+        from database.sqlite_backend import SQLiteStorage
+        return SQLiteStorage(os.environ.get("SQLITE_PATH", "portfolio.db"))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+storage = create_storage()
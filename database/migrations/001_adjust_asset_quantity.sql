@@ -0,0 +1,49 @@
+-- Atomic quantity updates for the portfolio table.
+-- Run once against the Supabase database (SQL editor or psql).
+
+-- Balances can never go negative, whatever path writes them. The constraint is
+-- added NOT VALID so it applies to new writes straight away, then the existing
+-- rows are validated. If earlier read-modify-write races left negative balances
+-- the validation fails and nothing here touches them: find them with
+--     select * from portfolio where quantity < 0;
+-- correct them by hand, then run this file again (adding the constraint is
+-- skipped if an earlier, non-transactional run already added it).
+do $$
+begin
+    if not exists (select 1 from pg_constraint where conname = 'portfolio_quantity_non_negative') then
+        alter table portfolio
+            add constraint portfolio_quantity_non_negative check (quantity >= 0) not valid;
+    end if;
+end;
+$$;
+
+alter table portfolio
+    validate constraint portfolio_quantity_non_negative;
+
+-- Add delta (negative to remove) to a user's holding and return the updated row.
+-- Postgres checks the quantity constraint on the proposed insert row before it
+-- looks for a conflict, so a plain upsert would reject a negative delta even
+-- when the existing balance covers it. The existing row is updated first (the
+-- check then applies to the new balance, and the row lock serializes concurrent
+-- calls for the same holding) and a row is only inserted when there is none
+-- yet; a negative delta for a missing holding is still rejected.
+create or replace function adjust_asset_quantity(p_user_id bigint, p_asset text, p_delta double precision)
+returns setof portfolio
+language plpgsql
+as $$
+begin
+    return query
+        update portfolio
+        set quantity = quantity + p_delta
+        where user_id = p_user_id and asset = p_asset
+        returning *;
+    if not found then
+        return query
+            insert into portfolio (user_id, asset, quantity)
+            values (p_user_id, p_asset, p_delta)
+            on conflict (user_id, asset)
+            do update set quantity = portfolio.quantity + excluded.quantity
+            returning *;
+    end if;
+end;
+$$;
@@ -0,0 +1,37 @@
+-- Batched quantity updates for the portfolio table.
+-- Run once against the Supabase database after 001_adjust_asset_quantity.sql.
+
+-- Apply many {"asset": ..., "quantity": ...} deltas to a user's holdings in one
+-- statement and return every updated row. Deltas for the same asset are summed
+-- first, held assets are updated and new ones inserted, the same way as
+-- adjust_asset_quantity. Everything runs in one statement, so if any resulting
+-- balance would be negative the check constraint rejects the whole batch.
+create or replace function apply_asset_deltas(p_user_id bigint, p_deltas jsonb)
+returns setof portfolio
+language sql
+as $$
+    with deltas as (
+        select d.asset, sum(d.quantity) as quantity
+        from jsonb_to_recordset(p_deltas) as d(asset text, quantity double precision)
+        group by d.asset
+    ),
+    updated as (
+        update portfolio p
+        set quantity = p.quantity + deltas.quantity
+        from deltas
+        where p.user_id = p_user_id and p.asset = deltas.asset
+        returning p.*
+    ),
+    inserted as (
+        insert into portfolio (user_id, asset, quantity)
+        select p_user_id, deltas.asset, deltas.quantity
+        from deltas
+        where deltas.asset not in (select asset from updated)
+        on conflict (user_id, asset)
+        do update set quantity = portfolio.quantity + excluded.quantity
+        returning *
+    )
+    select * from updated
+    union all
+    select * from inserted;
+$$;
@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+from database.storage import USER_COLUMNS, Storage
+
+SCHEMA = """
+create table if not exists users (
+    id integer primary key autoincrement,
+    name text not null,
+    email text not null,
+    age integer
+);
+create index if not exists users_name_idx on users (name);
+create index if not exists users_email_idx on users (email);
+
+create table if not exists portfolio (
+    id integer primary key autoincrement,
+    user_id integer not null references users (id) on delete cascade,
+    asset text not null,
+    quantity real not null check (quantity >= 0)
+);
+create unique index if not exists portfolio_user_asset_idx on portfolio (user_id, asset);
+"""
+
+# Same statements as the adjust_asset_quantity Postgres function: update the held
+# asset first so the check applies to the new balance, insert only if it is missing
+UPDATE_ASSET_SQL = """
+update portfolio set quantity = quantity + ? where user_id = ? and asset = ? returning *
+"""
+INSERT_ASSET_SQL = """
+insert into portfolio (user_id, asset, quantity) values (?, ?, ?)
+on conflict (user_id, asset) do update set quantity = portfolio.quantity + excluded.quantity
+returning *
+"""
+
+
+class SQLiteStorage(Storage):
+    """Embedded storage backend using a local SQLite database.
+
+    Useful for single-node deployments and for tests and benchmarks that must run
+    without network access. One connection is shared and guarded by a lock.
+    """
+
+    def __init__(self, path="portfolio.db"):
+        """Open (and if needed create) the database.
+
+        Args:
+            path (str): Database file path, or ':memory:' for a throwaway database
+        """
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("pragma foreign_keys = on")
+            if path != ":memory:":
+                self.connection.execute("pragma journal_mode = wal")
+            self.connection.executescript(SCHEMA)
+
+    def _query(self, sql, params=()):
+        """Run one statement and return its rows as dictionaries."""
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _check_columns(columns):
+        unknown = [column for column in columns if column not in USER_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown user columns: {', '.join(unknown)}")
+
+    def insert_user(self, name, email, age):
+        return self._query(
+            "insert into users (name, email, age) values (?, ?, ?) returning *", (name, email, age)
+        )[0]
+
+    def find_user(self, column, value):
+        self._check_columns([column])
+        rows = self._query(f"select * from users where {column} = ? order by id limit 1", (value,))
+        return rows[0] if rows else None
+
+    def update_user(self, user_id, column, value):
+        self._check_columns([column])
+        return self._query(f"update users set {column} = ? where id = ? returning *", (value, user_id))
+
+    def delete_user(self, user_id):
+        return self._query("delete from users where id = ? returning *", (user_id,))
+
+    def fetch_users_page(self, after_id, limit, columns):
+        self._check_columns(columns)
+        return self._query(
+            f"select {', '.join(columns)} from users where id > ? order by id limit ?",
+            (after_id if after_id is not None else -1, limit)
+        )
+
+    def fetch_all_users(self):
+        return self._query("select * from users order by id")
+
+    def fetch_asset_quantity(self, user_id, asset):
+        rows = self._query(
+            "select quantity from portfolio where user_id = ? and asset = ?", (user_id, asset)
+        )
+        return rows[0]["quantity"] if rows else 0
+
+    def upsert_asset(self, user_id, asset, quantity):
+        return self._query(
+            "insert into portfolio (user_id, asset, quantity) values (?, ?, ?) "
+            "on conflict (user_id, asset) do update set quantity = excluded.quantity returning *",
+            (user_id, asset, quantity)
+        )
+
+    def _adjust(self, user_id, asset, delta):
+        """Apply one delta inside the caller's transaction. Must hold the lock."""
+        rows = self.connection.execute(UPDATE_ASSET_SQL, (delta, user_id, asset)).fetchall()
+        if not rows:
+            rows = self.connection.execute(INSERT_ASSET_SQL, (user_id, asset, delta)).fetchall()
+        return [dict(row) for row in rows]
+
+    def adjust_asset_quantity(self, user_id, asset, delta):
+        return self.apply_asset_deltas(user_id, [{"asset": asset, "quantity": delta}])
+
+    def apply_asset_deltas(self, user_id, deltas):
+        totals = {}
+        for delta in deltas:
+            totals[delta["asset"]] = totals.get(delta["asset"], 0) + delta["quantity"]
+        rows = []
+        with self.lock:
+            self.connection.execute("begin immediate")
+            try:
+                for asset, quantity in totals.items():
+                    rows.extend(self._adjust(user_id, asset, quantity))
+                self.connection.execute("commit")
+            except Exception:
+                self.connection.execute("rollback")
+                raise
+        return rows
+
+    def fetch_user_assets(self, user_id):
+        return self._query("select asset, quantity from portfolio where user_id = ?", (user_id,))
+
+    def fetch_asset(self, user_id, asset):
+        return self._query(
+            "select asset, quantity from portfolio where user_id = ? and asset = ?", (user_id, asset)
+        )
+
+    def fetch_user_with_assets(self, name):
+        rows = self._query(
+            "select u.id, u.name, u.email, u.age, p.asset, p.quantity "
+            "from (select * from users where name = ? order by id limit 1) u "
+            "left join portfolio p on p.user_id = u.id",
+            (name,)
+        )
+        if not rows:
+            return None
+        user = {column: rows[0][column] for column in USER_COLUMNS}
+        user["portfolio"] = [
+            {"asset": row["asset"], "quantity": row["quantity"]}
+            for row in rows if row["asset"] is not None
+        ]
+        return user
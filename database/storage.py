@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+
+# Columns of the users table, the only ones that may be read or written by name
+USER_COLUMNS = ("id", "name", "email", "age")
+
+
+class Storage(ABC):
+    """Interface every storage backend implements for the repositories.
+
+    Methods return plain dictionaries (or lists of them) shaped like Supabase rows and
+    raise on failure; the repositories handle errors and caching on top of this.
+    """
+
+    # Users
+
+    @abstractmethod
+    def insert_user(self, name, email, age):
+        """Insert a user and return the created row."""
+
+    @abstractmethod
+    def find_user(self, column, value):
+        """Return the first user whose column equals value, or None."""
+
+    @abstractmethod
+    def update_user(self, user_id, column, value):
+        """Set one column of a user and return the updated rows."""
+
+    @abstractmethod
+    def delete_user(self, user_id):
+        """Delete a user and return the deleted rows."""
+
+    @abstractmethod
+    def fetch_users_page(self, after_id, limit, columns):
+        """Return up to limit users with id greater than after_id, ordered by id."""
+
+    @abstractmethod
+    def fetch_all_users(self):
+        """Return every user row."""
+
+    # Portfolio
+
+    @abstractmethod
+    def fetch_asset_quantity(self, user_id, asset):
+        """Return the quantity a user holds of an asset, 0 if none."""
+
+    @abstractmethod
+    def upsert_asset(self, user_id, asset, quantity):
+        """Set the quantity of a user's asset and return the updated rows."""
+
+    @abstractmethod
+    def adjust_asset_quantity(self, user_id, asset, delta):
+        """Atomically add delta to a user's asset and return the updated rows.
+
+        Must raise if the resulting quantity would be negative.
+        """
+
+    @abstractmethod
+    def apply_asset_deltas(self, user_id, deltas):
+        """Atomically apply many {'asset', 'quantity'} deltas and return the updated rows.
+
+        Must apply all deltas or none, and raise if any quantity would be negative.
+        """
+
+    @abstractmethod
+    def fetch_user_assets(self, user_id):
+        """Return every {'asset', 'quantity'} row of a user."""
+
+    @abstractmethod
+    def fetch_asset(self, user_id, asset):
+        """Return the {'asset', 'quantity'} rows of one asset of a user."""
+
+    @abstractmethod
+    def fetch_user_with_assets(self, name):
+        """Return a user row with its holdings under 'portfolio', or None."""
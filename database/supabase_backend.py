@@ -0,0 +1,142 @@
+from supabase import create_client, Client
+from database.storage import Storage
+
+
+class SupabaseStorage(Storage):
+    """Storage backend that talks to a hosted Supabase (Postgres) database over HTTP.
+
+    The adjust_asset_quantity and apply_asset_deltas database functions from
+    database/migrations must be installed.
+    """
+
+    def __init__(self, url, key):
+        """Create the Supabase client.
+
+        Args:
+            url (str): Supabase project URL
+            key (str): Supabase API key
+        """
+        self.client: Client = create_client(url, key)
+
+    def insert_user(self, name, email, age):
+        response = (
+            self.client.table("users")
+            .insert({"name": name, "email": email, "age": age})
+            .execute()
+        )
+        return response.data[0]
+
+    def find_user(self, column, value):
+        response = (
+            self.client.table("users")
+            .select("*")
+            .eq(column, value)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def update_user(self, user_id, column, value):
+        response = (
+            self.client.table("users")
+            .update({column: value})
+            .eq("id", user_id)
+            .execute()
+        )
+        return response.data
+
+    def delete_user(self, user_id):
+        response = (
+            self.client.table("users")
+            .delete()
+            .eq("id", user_id)
+            .execute()
+        )
+        return response.data
+
+    def fetch_users_page(self, after_id, limit, columns):
+        query = (
+            self.client.table("users")
+            .select(", ".join(columns))
+            .order("id")
+            .limit(limit)
+        )
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.execute().data
+
+    def fetch_all_users(self):
+        response = (
+            self.client.table("users")
+            .select("*")
+            .execute()
+        )
+        return response.data
+
+    def fetch_asset_quantity(self, user_id, asset):
+        response = (
+            self.client.table("portfolio")
+            .select("quantity")
+            .eq("user_id", user_id)
+            .eq("asset", asset)
+            .execute()
+        )
+        return response.data[0]["quantity"] if response.data else 0
+
+    def upsert_asset(self, user_id, asset, quantity):
+        response = (
+            self.client.table("portfolio")
+            .upsert(
+                {"user_id": user_id, "asset": asset, "quantity": quantity},
+                on_conflict="user_id,asset"
+            )
+            .execute()
+        )
+        return response.data
+
+    def adjust_asset_quantity(self, user_id, asset, delta):
+        response = (
+            self.client.rpc(
+                "adjust_asset_quantity",
+                {"p_user_id": user_id, "p_asset": asset, "p_delta": delta}
+            )
+            .execute()
+        )
+        return response.data
+
+    def apply_asset_deltas(self, user_id, deltas):
+        response = (
+            self.client.rpc(
+                "apply_asset_deltas",
+                {"p_user_id": user_id, "p_deltas": deltas}
+            )
+            .execute()
+        )
+        return response.data
+
+    def fetch_user_assets(self, user_id):
+        response = (
+            self.client.table("portfolio")
+            .select("asset, quantity")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return response.data
+
+    def fetch_asset(self, user_id, asset):
+        response = (
+            self.client.table("portfolio")
+            .select("asset, quantity")
+            .eq("user_id", user_id)
+            .eq("asset", asset)
+            .execute()
+        )
+        return response.data
+
+    def fetch_user_with_assets(self, name):
+        response = (
+            self.client.table("users")
+            .select("id, name, email, age, portfolio(asset, quantity)")
+            .eq("name", name)
+            .execute()
+        )
+        return response.data[0] if response.data else None
@@ -1,29 +1,206 @@
 import requests
 import os
+import threading
+import time
+from collections import Counter
 import yfinance as yf
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from repositories.history_repository import HistoryRepository
+from utils.cache import TTLCache
+from utils.single_flight import SingleFlight
 
 load_dotenv()
 api_key = os.getenv("CRYPTO_API")
 # print(api_key)
 
+# CoinGecko rejects very long query strings, so bulk requests are split
+# into chunks that keep each URL under this many characters
+MAX_URL_LENGTH = 2000
+
+# Connection pool and timeout settings for the shared CoinGecko session
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# Process-wide cache of current prices keyed by lowercase symbol, shared by every CryptoAsset
+price_cache = TTLCache(
+    ttl=float(os.getenv("PRICE_CACHE_TTL", "5")),
+    max_size=int(os.getenv("PRICE_CACHE_MAX_SIZE", "1024")),
+    stale_ttl=float(os.getenv("PRICE_CACHE_STALE_TTL", "30"))
+)
+
+# Concurrent identical upstream calls share one in-flight request
+request_flights = SingleFlight()
+history_flights = SingleFlight()
+
+# How often each symbol's price has been asked for, used to find hot symbols
+symbol_requests = Counter()
+_symbol_requests_lock = threading.Lock()
+# Most symbols tracked at once; clients can put any symbol in a price request
+SYMBOL_REQUESTS_MAX_SIZE = int(os.getenv("SYMBOL_REQUESTS_MAX_SIZE", "10000"))
+
+
+def _decay_symbol_requests():
+    """Halve every request count and drop the symbols that reach 0.
+    
+    Must be called with _symbol_requests_lock held.
+    """
+    for symbol in list(symbol_requests):
+        symbol_requests[symbol] //= 2
+        if symbol_requests[symbol] == 0:
+            del symbol_requests[symbol]
+
+
+def record_symbol_requests(symbols):
+    """Count price requests per symbol so hot symbols can be refreshed ahead of time.
+    
+    Whenever more than SYMBOL_REQUESTS_MAX_SIZE symbols are tracked, counts are decayed
+    and only the most requested half is kept, so the counter stays bounded even when
+    the refresher never runs.
+    
+    Args:
+        symbols (list): Symbols whose price was requested
+    """
+    with _symbol_requests_lock:
+        symbol_requests.update(symbols)
+        if len(symbol_requests) > SYMBOL_REQUESTS_MAX_SIZE:
+            _decay_symbol_requests()
+            # Keep room for new symbols so the next trim is not one request away
+            for symbol, _ in symbol_requests.most_common()[SYMBOL_REQUESTS_MAX_SIZE // 2:]:
+                del symbol_requests[symbol]
+
+
+def take_hot_symbols(top_n):
+    """Return the top_n most requested symbols and decay all request counts.
+    
+    Counts are halved on every call so symbols that stop being requested
+    eventually drop out.
+    
+    Args:
+        top_n (int): Maximum number of symbols to return
+        
+    Returns:
+        list: Symbols ordered from most to least requested
+    """
+    with _symbol_requests_lock:
+        hot = [symbol for symbol, _ in symbol_requests.most_common(top_n)]
+        _decay_symbol_requests()
+    return hot
+
 
 class FetchAPI():
     """Utility class for fetching cryptocurrency data from external APIs.
     
     This class provides methods to interact with the CoinGecko API for retrieving
     various cryptocurrency metrics such as price, market data, and other information.
+    
+    All instances share one keep-alive connection pool, so creating a FetchAPI per
+    request does not cost a new TCP+TLS handshake per call.
     """
-    def __init__(self):
+    _session = None
+    _session_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _stats = {"requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+
+    def __init__(self, session=None):
         """Initialize the FetchAPI with CoinGecko API configuration.
         
         Sets up the base URL and headers required for API requests including the API key.
+        
+        Args:
+            session (requests.Session, optional): Session to send requests with.
+                Defaults to the process-wide pooled session.
         """
         self.base_url = "https://api.coingecko.com/api/v3"
         self.headers = {
             "accept": "application/json",
             "x-cg-demo-api-key": api_key
         }
+        self.session = session or self.get_session()
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    @classmethod
+    def get_session(cls):
+        """Return the shared pooled session, creating it on first use.
+        
+        Returns:
+            requests.Session: Session with keep-alive, gzip and HTTP_POOL_SIZE connections
+        """
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive"
+                    })
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def get_transport_stats(cls):
+        """Report latency and connection usage of the shared session.
+        
+        Returns:
+            dict: Request count, error count, average and max latency in seconds,
+                plus the number of connections opened and the pool size
+        """
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+        stats["avg_seconds"] = stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        stats["pool_size"] = HTTP_POOL_SIZE
+        stats["connections_opened"] = 0
+        if cls._session is not None:
+            for adapter in set(cls._session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    stats["connections_opened"] += pools[key].num_connections
+        return stats
+
+    def _get(self, url):
+        """Send a GET request, sharing the response with concurrent callers of the same URL.
+        
+        Args:
+            url (str): Full URL to request
+            
+        Returns:
+            dict: Decoded JSON response
+        """
+        return request_flights.do(url, lambda: self._send(url))
+
+    def _send(self, url):
+        """Send a GET request through the session and record its latency.
+        
+        Args:
+            url (str): Full URL to request
+            
+        Returns:
+            dict: Decoded JSON response
+            
+        Raises:
+            requests.HTTPError: If CoinGecko answers with a non-2xx status
+        """
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
+            # Rate limits and server errors must not be mistaken for price data
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self._stats["requests"] += 1
+                self._stats["errors"] += failed
+                self._stats["total_seconds"] += elapsed
+                self._stats["max_seconds"] = max(self._stats["max_seconds"], elapsed)
 
     def get_price(self, symbol):
         """Fetch the current price of a cryptocurrency.
@@ -35,9 +212,55 @@ class FetchAPI():
             dict: JSON response containing price data in USD
         """
         url = f'{self.base_url}/simple/price/?vs_currencies=usd&symbols={symbol}'
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+        return self._get(url)
 
+    def get_bulk_prices(self, symbols):
+        """Fetch the current prices of many cryptocurrencies in as few requests as possible.
+        
+        All symbols are packed into a single ``simple/price`` request, which is only
+        split into several requests when the URL would exceed MAX_URL_LENGTH.
+        
+        Args:
+            symbols (list): Symbols of the cryptocurrencies (e.g., ['btc', 'eth'])
+            
+        Returns:
+            dict: Merged JSON responses containing price data in USD, keyed by symbol
+        """
+        prefix = f'{self.base_url}/simple/price/?vs_currencies=usd&symbols='
+        prices = {}
+        for chunk in self.chunk_symbols(symbols, MAX_URL_LENGTH - len(prefix)):
+            url = prefix + ','.join(chunk)
+            prices.update(self._get(url))
+        return prices
+
+    @staticmethod
+    def chunk_symbols(symbols, max_length):
+        """Split symbols into comma-joinable chunks no longer than max_length.
+        
+        Duplicate symbols are dropped while preserving the original order.
+        
+        Args:
+            symbols (list): Symbols of the cryptocurrencies
+            max_length (int): Maximum length of each comma-joined chunk
+            
+        Returns:
+            list: List of symbol lists
+        """
+        chunks = []
+        current = []
+        current_length = 0
+        for symbol in dict.fromkeys(symbols):
+            added_length = len(symbol) + (1 if current else 0)
+            if current and current_length + added_length > max_length:
+                chunks.append(current)
+                current = []
+                added_length = len(symbol)
+                current_length = 0
+            current.append(symbol)
+            current_length += added_length
+        if current:
+            chunks.append(current)
+        return chunks
     
     def get_coin_market_data(self, symbol):
         """Fetch comprehensive market data for a cryptocurrency.
@@ -49,8 +272,22 @@ class FetchAPI():
             dict: JSON response containing market data including price, market cap, volume, etc.
         """
         url = f'{self.base_url}/coins/markets?vs_currency=usd&symbols={symbol}'
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+        return self._get(url)
+
+    def get_bulk_market_data(self, symbols):
+        """Fetch market data for many cryptocurrencies in as few requests as possible.
+        
+        Args:
+            symbols (list): Symbols of the cryptocurrencies (e.g., ['btc', 'eth'])
+            
+        Returns:
+            list: Concatenated JSON responses, one market data entry per coin
+        """
+        prefix = f'{self.base_url}/coins/markets?vs_currency=usd&symbols='
+        market_data = []
+        for chunk in self.chunk_symbols(symbols, MAX_URL_LENGTH - len(prefix)):
+            market_data.extend(self._get(prefix + ','.join(chunk)))
+        return market_data
     
     
 class CryptoAsset:
@@ -75,6 +312,7 @@ class CryptoAsset:
         self.total_volume = None
         self.max_supply = None
         self.valuation = None
+        self.snapshot = None
         
 
     def get_info(self):
@@ -92,38 +330,171 @@ class CryptoAsset:
         Args:
             metric (str): The name of the metric to retrieve (e.g., 'market_cap', 'total_volume')
             
+        The market data is fetched once per asset and reused for every later
+        metric, see hydrate().
+        
         Returns:
             float: Value of the requested metric
         """
-        total_data = self.fetch.get_coin_market_data(self.name)
-        for data in total_data:
-            value = data[metric]
-        return value
+        if self.snapshot is None:
+            self.hydrate()
+        return self.snapshot.get(metric)
+
+    def hydrate(self, market_data=None):
+        """Fill market_cap, total_volume, max_supply and current_price from one response.
+        
+        Args:
+            market_data (list, optional): A ``coins/markets`` response containing this
+                asset, e.g. from FetchAPI.get_bulk_market_data. Fetched if None.
+            
+        Returns:
+            dict: The market data entry used as this asset's snapshot, empty if not found
+        """
+        if market_data is None:
+            market_data = self.fetch.get_coin_market_data(self.name)
+        return self.apply_snapshot(self.index_market_data(market_data, self.name).get(self.name.lower(), {}))
+
+    def apply_snapshot(self, snapshot):
+        """Store a market data entry as this asset's snapshot and copy out its metrics.
+        
+        Args:
+            snapshot (dict): One ``coins/markets`` entry, empty if the asset was not found
+            
+        Returns:
+            dict: The snapshot
+        """
+        self.snapshot = snapshot
+        self.market_cap = self.snapshot.get('market_cap')
+        self.total_volume = self.snapshot.get('total_volume')
+        self.max_supply = self.snapshot.get('max_supply')
+        self.current_price = self.snapshot.get('current_price')
+        if self.current_price:
+            price_cache.set(self.name.lower(), self.current_price)
+        return self.snapshot
+
+    @staticmethod
+    def index_market_data(market_data, default_symbol=None):
+        """Key a ``coins/markets`` response by lowercase symbol.
+        
+        CoinGecko returns lowercase symbols, so lookups must lowercase the requested
+        symbol too (e.g. 'BTC' from a route path).
+        
+        Args:
+            market_data (list): ``coins/markets`` response
+            default_symbol (str, optional): Symbol for entries that do not carry one
+            
+        Returns:
+            dict: Mapping of lowercase symbol to its market data entry
+        """
+        by_symbol = {}
+        for data in market_data:
+            symbol = data.get('symbol', default_symbol)
+            if symbol is not None:
+                by_symbol[symbol.lower()] = data
+        return by_symbol
+
+    @staticmethod
+    def hydrate_many(assets, fetch):
+        """Hydrate many CryptoAsset objects from a single bulk market data request.
+        
+        Args:
+            assets (list): CryptoAsset objects to hydrate
+            fetch (FetchAPI): An instance of FetchAPI for making API calls
+            
+        Returns:
+            list: The same CryptoAsset objects, now hydrated
+        """
+        if not assets:
+            return assets
+        by_symbol = CryptoAsset.index_market_data(fetch.get_bulk_market_data([asset.name for asset in assets]))
+        for asset in assets:
+            asset.apply_snapshot(by_symbol.get(asset.name.lower(), {}))
+        return assets
     
-    def get_value(self):
+    def get_value(self, price_data=None):
         """Retrieve the current price of the cryptocurrency.
         
         Attempts to get the price in USD first, then EUR, and finally falls back to
         the first available currency in the response. Returns 0 if no price is available.
         
+        Prices are served from the shared price cache when possible, so only a
+        cache miss goes to the API. Cache keys are lowercase symbols, so 'BTC' and
+        'btc' share one entry.
+        
+        Args:
+            price_data (dict, optional): A ``simple/price`` response that already contains
+                this asset, e.g. from FetchAPI.get_bulk_prices. Read from the cache if None.
+        
         Returns:
             float: Current price of the cryptocurrency
         """
-        self.current_price = self.fetch.get_price(self.name)
-        # Check which currency is available and use the first one
-        if self.name in self.current_price:
-            currency_data = self.current_price[self.name]
-            # Get the first available currency
-            if 'usd' in currency_data:
-                return currency_data['usd']
-            elif 'eur' in currency_data:
-                return currency_data['eur']
-            else:
-                # Get the first currency in the dictionary
-                first_currency = next(iter(currency_data))
-                return currency_data[first_currency]
-        # If we can't get a price, return 0
-        return 0
+        if price_data is None:
+            key = self.name.lower()
+            record_symbol_requests([key])
+            prices = price_cache.get_many_or_load(
+                [key], lambda keys: self.extract_prices(keys, self.fetch.get_price(self.name))
+            )
+            self.current_price = prices.get(key, 0)
+        else:
+            self.current_price = self.extract_price(self.name, price_data)
+        return self.current_price
+
+    @staticmethod
+    def extract_price(symbol, price_data):
+        """Pick the price of a symbol out of a ``simple/price`` response.
+        
+        The symbol is matched case-insensitively.
+        
+        Args:
+            symbol (str): Symbol of the cryptocurrency (e.g., 'btc', 'eth')
+            price_data (dict): JSON response from FetchAPI.get_price or get_bulk_prices
+            
+        Returns:
+            float: Price in USD, EUR or the first available currency, 0 if missing
+        """
+        currency_data = price_data.get(symbol)
+        if currency_data is None:
+            currency_data = CryptoAsset.index_prices(price_data).get(symbol.lower())
+        return CryptoAsset.currency_price(currency_data)
+
+    @staticmethod
+    def index_prices(price_data):
+        """Key a ``simple/price`` response by lowercase symbol."""
+        return {str(symbol).lower(): currency_data for symbol, currency_data in price_data.items()}
+
+    @staticmethod
+    def currency_price(currency_data):
+        """Pick USD, then EUR, then the first available currency from one symbol's entry, 0 if missing."""
+        if not currency_data:
+            # If we can't get a price, return 0
+            return 0
+        if 'usd' in currency_data:
+            return currency_data['usd']
+        elif 'eur' in currency_data:
+            return currency_data['eur']
+        else:
+            # Get the first currency in the dictionary
+            first_currency = next(iter(currency_data))
+            return currency_data[first_currency]
+
+    @staticmethod
+    def extract_prices(symbols, price_data):
+        """Pick the prices of several symbols out of a ``simple/price`` response.
+        
+        Symbols without a usable (non-zero) price are left out, so a missing coin or
+        an error body is never stored in the price cache as a price of 0. Symbols are
+        matched case-insensitively and returned as passed in.
+        
+        Args:
+            symbols (list): Symbols of the cryptocurrencies
+            price_data (dict): JSON response from FetchAPI.get_price or get_bulk_prices
+            
+        Returns:
+            dict: Mapping of symbol to price for the symbols that have one
+        """
+        by_symbol = CryptoAsset.index_prices(price_data)
+        prices = {symbol: CryptoAsset.currency_price(by_symbol.get(symbol.lower())) for symbol in symbols}
+        return {symbol: price for symbol, price in prices.items() if price}
 
     def get_market_cap(self):
         """Retrieve the market capitalization of the cryptocurrency.
@@ -152,16 +523,44 @@ class CryptoAsset:
         self.max_supply = self.get_metric("max_supply")
         return self.max_supply
 
-    def get_valuation(self, quantity):
+    @staticmethod
+    def get_bulk_values(symbols, fetch):
+        """Retrieve the current prices of many cryptocurrencies with one bulk request.
+        
+        Symbols found in the shared price cache are not requested again; all
+        remaining symbols are fetched together.
+        
+        Args:
+            symbols (list): Symbols of the cryptocurrencies (e.g., ['btc', 'eth'])
+            fetch (FetchAPI): An instance of FetchAPI for making API calls
+            
+        Returns:
+            dict: Mapping of symbol to current price, 0 for symbols without a price
+        """
+        if not symbols:
+            return {}
+        # The cache is keyed by lowercase symbol, the result by the symbols as given
+        keys = [symbol.lower() for symbol in symbols]
+        record_symbol_requests(keys)
+
+        def load(missing):
+            return CryptoAsset.extract_prices(missing, fetch.get_bulk_prices(missing))
+
+        prices = price_cache.get_many_or_load(keys, load)
+        return {symbol: prices.get(symbol.lower(), 0) for symbol in symbols}
+
+    def get_valuation(self, quantity, price=None):
         """Calculate the total value of a specified quantity of the cryptocurrency.
         
         Args:
             quantity (float): Amount of the cryptocurrency
+            price (float, optional): Known current price, e.g. from get_bulk_values.
+                Fetched if None.
             
         Returns:
             float: Total value based on current price and specified quantity
         """
-        self.current_price = self.get_value()
+        self.current_price = self.get_value() if price is None else price
         self.valuation = quantity * self.current_price
         return self.valuation
     
@@ -177,14 +576,19 @@ class CryptoAsset:
     def get_historical_data_period(self, period):
         """Retrieve historical price data for the cryptocurrency over a specified period.
         
+        Bars are served from the local history store, which only downloads the bars
+        it does not have yet. Concurrent requests for the same symbol and period share
+        one lookup.
+        
         Args:
             period (str): Time period for historical data (e.g., '1d', '1mo', '1y')
             
         Returns:
             pandas.DataFrame: Historical price data including Open, High, Low, Close, and Volume
         """
-        historical = yf.Ticker(self.name)
-        return historical.history(period=period)
+        return history_flights.do(
+            (self.name, period), lambda: HistoryRepository.get_history(self.name, period)
+        )
         
 
 # fetch = FetchAPI()
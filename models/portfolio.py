@@ -8,16 +8,66 @@ class Portfolio:
     This class provides methods for adding, removing, and querying assets in a user's portfolio,
     as well as calculating portfolio valuations and individual asset values.
     """
-    def __init__(self, user: User, fetch_api=None):
+    def __init__(self, user: User, fetch_api=None, holdings=None, lazy=False):
         """Initialize a Portfolio instance for a specific user.
         
+        Holdings are kept in an in-memory map that is loaded at most once, so repeated
+        reads within a request or job cost no extra database round trips.
+        
         Args:
             user (User): User object containing user information (id, name)
             fetch_api (FetchAPI, optional): API for fetching cryptocurrency data. Defaults to None.
+            holdings (list, optional): Already loaded holdings (asset symbol and quantity).
+                Defaults to None, in which case they are loaded from the database.
+            lazy (bool): Load holdings on first use instead of immediately. Defaults to False.
         """
+        self.user = user
         self.user_id = user.id
         self.name = user.name
-        self.fetch_api = FetchAPI()
+        self.fetch_api = fetch_api or FetchAPI()
+        self.holdings = None
+        self.pending = {}
+        if holdings is not None:
+            self.holdings = {holding['asset']: holding['quantity'] for holding in holdings}
+        elif not lazy:
+            self.load_holdings()
+
+    @classmethod
+    def from_user_name(cls, name, fetch_api=None):
+        """Load a user and all of their holdings with a single database round trip.
+        
+        Args:
+            name (str): Name of the user
+            fetch_api (FetchAPI, optional): API for fetching cryptocurrency data. Defaults to None.
+            
+        Returns:
+            Portfolio: Portfolio with its holdings loaded, None if the user does not exist
+        """
+        user_data = PortfolioRepository.fetch_user_with_assets(name)
+        if not user_data:
+            return None
+        user = User(
+            id=user_data['id'],
+            name=user_data['name'],
+            email=user_data['email'],
+            age=user_data['age']
+        )
+        return cls(user, fetch_api, holdings=user_data.get('portfolio') or [])
+
+    def load_holdings(self):
+        """Load the user's holdings into the in-memory map if not loaded yet.
+        
+        Returns:
+            dict: Mapping of asset symbol to quantity
+        """
+        if self.holdings is None:
+            assets = PortfolioRepository.fetch_user_assets(self.user_id) or []
+            self.holdings = {asset_data['asset']: asset_data['quantity'] for asset_data in assets}
+        return self.holdings
+
+    def is_dirty(self):
+        """Return True if there are deferred changes that have not been flushed."""
+        return bool(self.pending)
 
     def fetch_user_assets(self):
         """Retrieve all cryptocurrency assets owned by the user.
@@ -25,7 +75,10 @@ class Portfolio:
         Returns:
             list: List of dictionaries containing asset information (asset symbol and quantity)
         """
-        return PortfolioRepository.fetch_user_assets(self.user_id)
+        return [
+            {"asset": asset, "quantity": quantity}
+            for asset, quantity in self.load_holdings().items()
+        ]
             
     def fetch_singular_asset(self, asset):
         """Retrieve information about a specific asset in the user's portfolio.
@@ -36,7 +89,10 @@ class Portfolio:
         Returns:
             list: List containing a dictionary with asset information
         """
-        return PortfolioRepository.fetch_asset(self.user_id, asset)    
+        holdings = self.load_holdings()
+        if asset not in holdings:
+            return []
+        return [{"asset": asset, "quantity": holdings[asset]}]
 
     def get_crypto_data(self, user_asset):
         """Helper function to create a CryptoAsset object for a specific asset.
@@ -62,7 +118,7 @@ class Portfolio:
         Returns:
             float: Quantity of the asset owned by the user
         """
-        quantity = PortfolioRepository.check_asset_quantity(self.user_id, asset)
+        quantity = self.load_holdings().get(asset, 0)
         if quantity == 0:
             print(f"No {asset} found for user {self.name}")
         return quantity
@@ -81,33 +137,92 @@ class Portfolio:
         updated_value = existing + new_value
         return updated_value
 
-    def add_asset(self, asset, quantity):
+    def _store_rows(self, rows):
+        """Update the holdings map from rows returned by the database, keeping deferred changes."""
+        if rows and self.holdings is not None:
+            for row in rows:
+                self.holdings[row['asset']] = row['quantity'] + self.pending.get(row['asset'], 0)
+        return rows
+
+    def add_asset(self, asset, quantity, defer=False):
         """Add a new asset or update the quantity of an existing asset in the portfolio.
         
+        The quantity is added in the database in a single atomic statement, so
+        concurrent updates to the same asset cannot overwrite each other. With
+        defer=True the change is only recorded as dirty and written by flush().
+        
         Args:
             asset (str): Symbol of the cryptocurrency asset
             quantity (float): Quantity to add to the portfolio
+            defer (bool): Batch the change until flush() is called. Defaults to False.
             
         Returns:
             list: Updated asset information after addition
         """
-        updated_value = self.add_quantity(asset, quantity)
-        return PortfolioRepository.add_or_update_asset(self.user_id, asset, updated_value)        
+        if defer:
+            return self._defer_delta(asset, quantity)
+        return self._store_rows(PortfolioRepository.adjust_asset_quantity(self.user_id, asset, quantity))
 
-    def remove_asset(self, asset, quantity):
+    def remove_asset(self, asset, quantity, defer=False):
         """Remove a specified quantity of an asset from the portfolio.
         
+        The removal is rejected by the database if it would leave a negative balance.
+        With defer=True the change is only recorded as dirty and written by flush().
+        
         Args:
             asset (str): Symbol of the cryptocurrency asset
             quantity (float): Quantity to remove from the portfolio
+            defer (bool): Batch the change until flush() is called. Defaults to False.
             
         Returns:
-            list: Updated asset information after removal
+            list: Updated asset information after removal, None if rejected
         """
         quantity = -quantity  # Convert to negative for subtraction
+        if defer:
+            return self._defer_delta(asset, quantity)
+        return self._store_rows(PortfolioRepository.adjust_asset_quantity(self.user_id, asset, quantity))
+
+    def _defer_delta(self, asset, quantity):
+        """Apply a delta to the holdings map and record it as dirty."""
         updated_value = self.add_quantity(asset, quantity)
-        return PortfolioRepository.add_or_update_asset(self.user_id, asset, updated_value)        
+        if updated_value < 0:
+            print(f"Cannot remove more {asset} than user {self.name} holds")
+            return None
+        self.holdings[asset] = updated_value
+        self.pending[asset] = self.pending.get(asset, 0) + quantity
+        return [{"asset": asset, "quantity": updated_value}]
+
+    def flush(self):
+        """Write every deferred change to the database in one batched update.
+        
+        If the database rejects the batch nothing is written and the deferred changes
+        are kept, so is_dirty() stays True and the flush can be retried.
+        
+        Returns:
+            list: Updated asset information for every flushed asset, None if rejected
+        """
+        if not self.pending:
+            return []
+        deltas = [{"asset": asset, "quantity": quantity} for asset, quantity in self.pending.items()]
+        rows = PortfolioRepository.apply_asset_deltas(self.user_id, deltas)
+        if rows is None:
+            return None
+        self.pending = {}
+        return self._store_rows(rows)
     
+    def apply_asset_deltas(self, deltas):
+        """Add or remove quantities of many assets in a single batched update.
+        
+        Args:
+            deltas (list): Dictionaries with 'asset' and 'quantity' (negative to remove)
+            
+        Returns:
+            list: Updated asset information for every affected asset, None if rejected
+        """
+        if not deltas:
+            return []
+        return self._store_rows(PortfolioRepository.apply_asset_deltas(self.user_id, deltas))
+
     def crypto_current_price(self, user_asset):
         """Calculate the total value of a specific asset in the portfolio.
         
@@ -122,27 +237,45 @@ class Portfolio:
         crypto_value = crypto_asset.get_valuation(quantity)
         return crypto_value
 
-    def total_portfolio_valuation(self):
-        """Calculate the total value of all assets in the user's portfolio.
+    def valuation_snapshot(self):
+        """Value every holding in the portfolio in a single pass.
         
-        Iterates through all assets in the portfolio, calculates their current value,
-        and returns the sum of all asset values.
+        Holdings are loaded once and priced with one bulk request, and both the
+        per-asset breakdown and the total are computed from that same snapshot.
         
         Returns:
-            float: Total portfolio value in USD
+            dict: 'total_value' (float) and 'assets', a list of dictionaries with
+                asset symbol, quantity, price and value
         """
         total_assets = self.fetch_user_assets()
-        total_value = 0
         if not total_assets:
-            return 0
+            return {"total_value": 0, "assets": []}
+        prices = CryptoAsset.get_bulk_values(
+            [asset_data['asset'] for asset_data in total_assets], self.fetch_api
+        )
+        assets = []
+        total_value = 0
         for asset_data in total_assets:
             asset_symbol = asset_data['asset']
             quantity = asset_data['quantity']
             crypto_asset = CryptoAsset(asset_symbol, self.fetch_api)
-            asset_value = crypto_asset.get_valuation(quantity)
+            asset_value = crypto_asset.get_valuation(quantity, prices[asset_symbol])
+            assets.append({
+                "asset": asset_symbol,
+                "quantity": quantity,
+                "price": prices[asset_symbol],
+                "value": asset_value
+            })
             total_value += asset_value
-        return total_value
+        return {"total_value": total_value, "assets": assets}
 
+    def total_portfolio_valuation(self):
+        """Calculate the total value of all assets in the user's portfolio.
+        
+        Returns:
+            float: Total portfolio value in USD
+        """
+        return self.valuation_snapshot()["total_value"]
 
 # user1 = User('charles', 'charles.joseph2103@gmail.com', 21)
 # portfolio = Portfolio(user1)
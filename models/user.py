@@ -1,4 +1,4 @@
-from repositories.user_repository import UserRepository
+from repositories.user_repository import USER_COLUMNS, UserRepository
 
 class User:
     """User class for managing user data and operations.
@@ -159,4 +159,34 @@ class User:
             return UserRepository.fetch_all_users()
         except Exception as e:
             print(f"Error fetching all users: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @classmethod
+    def fetch_users_page(cls, after_id=None, limit=100, columns=USER_COLUMNS):
+        """Retrieve one page of users ordered by id.
+        
+        Args:
+            after_id (int, optional): Only return users with a larger id (the cursor)
+            limit (int): Maximum number of users in the page
+            columns (tuple): Columns to return; 'id' is always included
+            
+        Returns:
+            list: List of dictionaries containing user data if successful, None otherwise
+        """
+        return UserRepository.fetch_users_page(after_id, limit, columns)
+
+    @classmethod
+    def iter_all_users(cls, page_size=1000, columns=USER_COLUMNS):
+        """Lazily iterate over every user, one page at a time.
+        
+        Args:
+            page_size (int): Number of users fetched per round trip
+            columns (tuple): Columns to return; 'id' is always included
+            
+        Yields:
+            list: Pages of dictionaries containing user data
+            
+        Raises:
+            Exception: If fetching a page fails, the iteration stops with the storage error
+        """
+        return UserRepository.iter_users(page_size, columns)
@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import yfinance as yf
+
+# Directory holding one Parquet file of OHLCV bars per (symbol, interval)
+HISTORY_DIR = os.getenv("HISTORY_DIR", ".history")
+# Seconds before the newest stored bars are considered out of date and the tail is re-fetched
+HISTORY_REFRESH_SECONDS = float(os.getenv("HISTORY_REFRESH_SECONDS", "300"))
+# Most (symbol, interval) frames kept in memory; older ones are reloaded from disk
+HISTORY_MEMORY_MAX_SIZE = int(os.getenv("HISTORY_MEMORY_MAX_SIZE", "256"))
+# Symbols and intervals become file names, so only plain ticker characters are allowed
+SYMBOL_PATTERN = re.compile(r"^[A-Za-z0-9.\-]{1,20}$")
+# Periods accepted by yfinance, and so by get_history
+HISTORY_PERIODS = ("1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max")
+
+
+class HistoryRepository:
+    """Repository class for the local columnar store of historical OHLCV data.
+
+    Bars are kept on disk as Parquet, one file per symbol and interval, and in memory
+    once loaded. A request for any period is served as a slice of the stored bars;
+    yfinance is only asked for the bars missing at the end (or the start, the first
+    time a longer period is requested).
+    """
+
+    _frames = OrderedDict()
+    _meta = {}
+    _frames_lock = threading.Lock()
+    # A fixed set of locks shared by hash, so locking does not grow with every symbol
+    _locks = [threading.Lock() for _ in range(64)]
+    _stats = {"requests": 0, "full_fetches": 0, "tail_fetches": 0}
+
+    @staticmethod
+    def is_valid_symbol(symbol):
+        """Return True if a symbol (or interval) is safe to use in a file name."""
+        return isinstance(symbol, str) and SYMBOL_PATTERN.match(symbol) is not None
+
+    @staticmethod
+    def is_valid_period(period):
+        """Return True if a period is one of HISTORY_PERIODS."""
+        return period in HISTORY_PERIODS
+
+    @staticmethod
+    def _lock_for(key):
+        return HistoryRepository._locks[hash(key) % len(HistoryRepository._locks)]
+
+    @staticmethod
+    def _paths(symbol, interval):
+        if not (HistoryRepository.is_valid_symbol(symbol) and HistoryRepository.is_valid_symbol(interval)):
+            raise ValueError(f"Invalid symbol or interval: {symbol!r}, {interval!r}")
+        base = os.path.join(HISTORY_DIR, f"{symbol}_{interval}")
+        return base + ".parquet", base + ".json"
+
+    @staticmethod
+    def _remember(key, frame, meta):
+        """Keep a frame in memory, evicting the least recently used beyond HISTORY_MEMORY_MAX_SIZE."""
+        with HistoryRepository._frames_lock:
+            HistoryRepository._frames[key] = frame
+            HistoryRepository._frames.move_to_end(key)
+            HistoryRepository._meta[key] = meta
+            while len(HistoryRepository._frames) > HISTORY_MEMORY_MAX_SIZE:
+                evicted, _ = HistoryRepository._frames.popitem(last=False)
+                HistoryRepository._meta.pop(evicted, None)
+
+    @staticmethod
+    def period_start(period, now):
+        """Return the first timestamp covered by a yfinance period string.
+
+        Args:
+            period (str): Time period (e.g., '5d', '1mo', '1y', 'ytd', 'max')
+            now (pandas.Timestamp): Reference time
+
+        Returns:
+            pandas.Timestamp: Start of the period, None for 'max'
+        """
+        if period == "max":
+            return None
+        if period == "ytd":
+            return now.normalize().replace(month=1, day=1)
+        if period.endswith("mo"):
+            return now - pd.DateOffset(months=int(period[:-2]))
+        if period.endswith("y"):
+            return now - pd.DateOffset(years=int(period[:-1]))
+        if period.endswith("d"):
+            return now - pd.DateOffset(days=int(period[:-1]))
+        raise ValueError(f"Unsupported period: {period}")
+
+    @staticmethod
+    def _load(key):
+        """Load stored bars and metadata for a key from memory or disk."""
+        with HistoryRepository._frames_lock:
+            if key in HistoryRepository._frames:
+                HistoryRepository._frames.move_to_end(key)
+                return HistoryRepository._frames[key], HistoryRepository._meta[key]
+        data_path, meta_path = HistoryRepository._paths(*key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        frame = pd.read_parquet(data_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        HistoryRepository._remember(key, frame, meta)
+        return frame, meta
+
+    @staticmethod
+    def _save(key, frame, meta):
+        """Write bars and metadata for a key to memory and disk."""
+        HistoryRepository._remember(key, frame, meta)
+        try:
+            os.makedirs(HISTORY_DIR, exist_ok=True)
+            data_path, meta_path = HistoryRepository._paths(*key)
+            frame.to_parquet(data_path)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        except Exception as e:
+            print(f"Error saving history: {str(e)}")
+
+    @staticmethod
+    def get_history(symbol, period, interval="1d"):
+        """Return OHLCV bars for a symbol over a period, fetching only what is missing.
+
+        Args:
+            symbol (str): Symbol of the cryptocurrency (e.g., 'btc', 'eth')
+            period (str): Time period for historical data (e.g., '1d', '1mo', '1y')
+            interval (str): Bar interval (e.g., '1d', '1h')
+
+        Returns:
+            pandas.DataFrame: Historical price data including Open, High, Low, Close, and Volume
+
+        Raises:
+            ValueError: If the period is not in HISTORY_PERIODS, or the symbol or interval
+                contains characters not allowed in SYMBOL_PATTERN
+        """
+        key = (symbol, interval)
+        # Validate before anything touches yfinance, the cache or the disk
+        if not HistoryRepository.is_valid_period(period):
+            raise ValueError(f"Unsupported period: {period}")
+        HistoryRepository._paths(*key)
+        with HistoryRepository._lock_for(key):
+            HistoryRepository._stats["requests"] += 1
+            frame, meta = HistoryRepository._load(key)
+            covers_period = (
+                frame is not None
+                and not frame.empty
+                and (meta["covered_period"] == "max" or (
+                    period != "max"
+                    and HistoryRepository.period_start(period, frame.index[-1])
+                    >= HistoryRepository.period_start(meta["covered_period"], frame.index[-1])
+                ))
+            )
+            if not covers_period:
+                HistoryRepository._stats["full_fetches"] += 1
+                frame = yf.Ticker(symbol).history(period=period, interval=interval)
+                HistoryRepository._save(key, frame, {"covered_period": period, "updated_at": time.time()})
+            elif time.time() - meta["updated_at"] > HISTORY_REFRESH_SECONDS:
+                HistoryRepository._stats["tail_fetches"] += 1
+                tail = yf.Ticker(symbol).history(start=frame.index[-1].strftime("%Y-%m-%d"), interval=interval)
+                if not tail.empty:
+                    frame = pd.concat([frame, tail])
+                    # The last stored bar may have been partial, keep the newer copy
+                    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                HistoryRepository._save(key, frame, {**meta, "updated_at": time.time()})
+
+        if frame.empty:
+            return frame
+        start = HistoryRepository.period_start(period, pd.Timestamp.now(tz=frame.index.tz))
+        return frame if start is None else frame[frame.index >= start]
+
+    @staticmethod
+    def get_stats():
+        """Report how many history requests were served and how many needed yfinance.
+
+        Returns:
+            dict: Requests, full fetches and tail fetches
+        """
+        return dict(HistoryRepository._stats)
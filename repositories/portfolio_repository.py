@@ -1,4 +1,4 @@
-from database.db import supabase
+from database import db
 
 class PortfolioRepository:
     """Repository class for handling all portfolio-related database operations"""
@@ -7,18 +7,7 @@ class PortfolioRepository:
     def check_asset_quantity(user_id, asset):
         """Check the quantity of a specific asset for a user"""
         try:
-            response = (
-                supabase.table("portfolio")
-                .select("quantity")
-                .eq("user_id", user_id)
-                .eq("asset", asset)
-                .execute()
-            )
-            
-            if response.data and len(response.data) > 0:
-                return response.data[0]["quantity"]
-            else:
-                return 0
+            return db.storage.fetch_asset_quantity(user_id, asset)
         except Exception as e:
             print(f"Error checking quantity: {str(e)}")
             return 0
@@ -27,30 +16,55 @@ class PortfolioRepository:
     def add_or_update_asset(user_id, asset, quantity):
         """Add or update an asset in a user's portfolio"""
         try:
-            response = (
-                supabase.table("portfolio")
-                .upsert(
-                    {"user_id": user_id, "asset": asset, "quantity": quantity},
-                    on_conflict="user_id,asset"
-                )
-                .execute()
-            )
-            return response.data
+            return db.storage.upsert_asset(user_id, asset, quantity)
         except Exception as e:
             print(f"Error adding/updating asset: {str(e)}")
             return None
     
+    @staticmethod
+    def adjust_asset_quantity(user_id, asset, delta):
+        """Atomically add delta (negative to remove) to an asset in one round trip.
+        
+        The storage backend applies it in a single statement and rejects any change
+        that would make the balance negative.
+        """
+        try:
+            return db.storage.adjust_asset_quantity(user_id, asset, delta)
+        except Exception as e:
+            print(f"Error adjusting asset quantity: {str(e)}")
+            return None
+    
+    @staticmethod
+    def apply_asset_deltas(user_id, deltas):
+        """Apply many quantity deltas to a user's portfolio in one batched upsert.
+        
+        The storage backend applies every delta in one transaction and rejects the whole batch if any balance would go negative.
+        """
+        try:
+            return db.storage.apply_asset_deltas(user_id, deltas)
+        except Exception as e:
+            print(f"Error applying asset deltas: {str(e)}")
+            return None
+    
+    @staticmethod
+    def fetch_user_with_assets(name):
+        """Fetch a user row and all of its holdings in one joined query"""
+        try:
+            user_data = db.storage.fetch_user_with_assets(name)
+            if user_data:
+                return user_data
+            else:
+                print(f"No user found with name: {name}")
+                return None
+        except Exception as e:
+            print(f"Error fetching user with assets: {str(e)}")
+            return None
+    
     @staticmethod
     def fetch_user_assets(user_id):
         """Fetch all assets for a specific user"""
         try:
-            response = (
-                supabase.table("portfolio")
-                .select("asset, quantity")
-                .eq("user_id", user_id)
-                .execute()
-            )
-            return response.data
+            return db.storage.fetch_user_assets(user_id)
         except Exception as e:
             print(f"Error fetching user assets: {str(e)}")
             return []
@@ -59,14 +73,7 @@ class PortfolioRepository:
     def fetch_asset(user_id, asset):
         """Fetch a specific asset for a specific user"""
         try:
-            response = (
-                supabase.table("portfolio")
-                .select("asset, quantity")
-                .eq("user_id", user_id)
-                .eq("asset", asset)
-                .execute()
-            )
-            return response.data
+            return db.storage.fetch_asset(user_id, asset)
         except Exception as e:
             print(f"Error fetching user asset: {str(e)}")
             return []
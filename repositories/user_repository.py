@@ -1,17 +1,47 @@
-from database.db import supabase
+import json
+import os
+from database import db
+from database.storage import USER_COLUMNS
+from utils.cache import TTLCache
+
+# Read-through cache of user rows keyed by ("name", name) and ("email", email)
+user_cache = TTLCache(
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    max_size=int(os.getenv("USER_CACHE_MAX_SIZE", "10000")),
+    stale_ttl=0
+)
+# Also remember names and emails that do not exist, so repeated misses skip the database
+USER_CACHE_NEGATIVE = os.getenv("USER_CACHE_NEGATIVE", "").lower() in ("1", "true", "yes")
 
 class UserRepository:
     """Repository class for handling all user related database operations"""
 
+    @staticmethod
+    def _cached_user(column, value):
+        """Look a user up by name or email, going to the database only on a cache miss"""
+        found, user_data = user_cache.get((column, value))
+        if found:
+            return user_data
+        user_data = db.storage.find_user(column, value)
+        if user_data is not None:
+            user_cache.set_many({("name", user_data["name"]): user_data, ("email", user_data["email"]): user_data})
+        elif USER_CACHE_NEGATIVE:
+            user_cache.set((column, value), None)
+        return user_data
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """Drop every cached entry for a user after it changes"""
+        user_cache.invalidate_where(lambda user_data: user_data is not None and user_data["id"] == user_id)
+
     @staticmethod
     def input_user_data(name, email, age):
         try:
-            response = (
-                supabase.table("users")
-                .insert({"name": name, "email": email, "age": age})
-                .execute()
-            )
-            return response.data[0] # Return the raw data
+            user_data = db.storage.insert_user(name, email, age)
+            # Forget any negative entries for the new name and email
+            user_cache.invalidate(("name", name))
+            user_cache.invalidate(("email", email))
+            return user_data # Return the raw data
         except Exception as e:
             print(f"Error creating user: {str(e)}")
             return None
@@ -19,14 +49,9 @@ class UserRepository:
     @staticmethod
     def fetch_users(name):
         try:
-            response = (
-                    supabase.table("users")
-                    .select("*")
-                    .eq("name", name)
-                    .execute()
-                )
-            if response.data and len(response.data) > 0:
-                return response.data[0]
+            user_data = UserRepository._cached_user("name", name)
+            if user_data:
+                return user_data
             else:
                 print(f"No user found with name: {name}")
                 return None
@@ -37,14 +62,9 @@ class UserRepository:
     @staticmethod
     def find_user_by_email(email):
         try:
-            response = (
-                supabase.table("users")
-                .select("*")
-                .eq("email", email)
-                .execute()
-                )
-            if response.data and len(response.data) > 0:
-                return response.data[0]
+            user_data = UserRepository._cached_user("email", email)
+            if user_data:
+                return user_data
             else:
                 print(f"No user found with email: {email}")
                 return None
@@ -55,26 +75,21 @@ class UserRepository:
     @staticmethod
     def update(user_id, param_to_update, new_value): 
         try:           
-            response = (
-                    supabase.table("users")
-                    .update({param_to_update: new_value})
-                    .eq("id", user_id)
-                    .execute()
-                )
-            return response.data
+            updated = db.storage.update_user(user_id, param_to_update, new_value)
+            UserRepository.invalidate_user(user_id)
+            # Forget any negative entry for the new name or email
+            if param_to_update in ("name", "email"):
+                user_cache.invalidate((param_to_update, new_value))
+            return updated
         except Exception as e:
             print(f"Error updating user: {str(e)}")
             return None
 
     def delete(user_id):
         try:
-            response = (
-                    supabase.table("users")
-                    .delete()
-                    .eq("id", user_id)
-                    .execute()
-                )
-            return response
+            deleted = db.storage.delete_user(user_id)
+            UserRepository.invalidate_user(user_id)
+            return deleted
         except Exception as e:
             print(f"Error deleting user: {str(e)}")
             return None
@@ -82,14 +97,38 @@ class UserRepository:
         
     def fetch_all_users():
         try:
-            response = (
-                supabase.table("users")
-                .select("*")
-                .execute()
-                    )
-            return response.model_dump_json()
+            return json.dumps({"data": db.storage.fetch_all_users(), "count": None})
         except Exception as e:
             print(f"Error updating user: {str(e)}")
 
+    @staticmethod
+    def _users_page(after_id, limit, columns):
+        """Fetch one page of users, raising on failure"""
+        columns = ["id"] + [column for column in columns if column != "id"]
+        return db.storage.fetch_users_page(after_id, limit, columns)
+
+    @staticmethod
+    def fetch_users_page(after_id=None, limit=100, columns=USER_COLUMNS):
+        """Fetch one page of users ordered by id, starting after the given id (keyset pagination)"""
+        try:
+            return UserRepository._users_page(after_id, limit, columns)
+        except Exception as e:
+            print(f"Error fetching users page: {str(e)}")
+            return None
 
+    @staticmethod
+    def iter_users(page_size=1000, columns=USER_COLUMNS):
+        """Lazily yield pages of users, only fetching the next page when it is needed.
 
+        A failed page fetch raises instead of ending the iteration, so callers can
+        tell a truncated listing from a complete one.
+        """
+        after_id = None
+        while True:
+            page = UserRepository._users_page(after_id, page_size, columns)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
@@ -1,14 +1,29 @@
+import math
+import os
+import numpy as np
 import pandas as pd 
 import yfinance as yf
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from models.crypto_asset import FetchAPI
 from models.crypto_asset import CryptoAsset
 
+# Maximum number of histories downloaded in parallel by Analytics.batch_indicators
+ANALYTICS_BATCH_WORKERS = int(os.getenv("ANALYTICS_BATCH_WORKERS", "8"))
+# Maximum number of distinct symbols accepted by one Analytics.batch_indicators call
+ANALYTICS_BATCH_MAX_SYMBOLS = int(os.getenv("ANALYTICS_BATCH_MAX_SYMBOLS", "100"))
+
+# Shared by every batch so concurrent requests together never exceed ANALYTICS_BATCH_WORKERS downloads
+_batch_executor = ThreadPoolExecutor(max_workers=ANALYTICS_BATCH_WORKERS, thread_name_prefix="analytics-batch")
+
 class Analytics:
     """
     Analytics class to calculate various metrics about a particular portfolio or assets within 
     that portfolio
     """
 
+    BUNDLE_INDICATORS = ('rolling_mean', 'moving_volume', 'volatility', 'sharpe_ratio')
+
     def __init__(self, fetch_api=None):
         """Initialize the Analytics class.
         
@@ -74,7 +89,7 @@ class Analytics:
         """
         historical_data = self.get_historical_crypto_data(crypto, period)
         # Calculate daily returns
-        returns = historical_data['Close'].pct_change().dropna()
+        returns = historical_data['Close'].pct_change(fill_method=None).dropna()
         # Calculate rolling standard deviation and annualize
         volatility = returns.rolling(window=window).std() * (252 ** 0.5) * 100
         return volatility
@@ -93,7 +108,7 @@ class Analytics:
             float: Sharpe ratio
         """
         historical_data = self.get_historical_crypto_data(crypto, period)
-        returns = historical_data['Close'].pct_change().dropna()
+        returns = historical_data['Close'].pct_change(fill_method=None).dropna()
         
         # Annualized return and volatility
         annual_return = returns.mean() * 252
@@ -102,7 +117,409 @@ class Analytics:
         # Calculate Sharpe ratio
         sharpe_ratio = (annual_return - risk_free_rate) / annual_volatility
         return sharpe_ratio
+
+    def indicator_bundle(self, crypto, indicators, period='1y'):
+        """Calculate several indicators for a cryptocurrency from a single history fetch.
+        
+        The history is downloaded once and the returns and rolling windows are shared
+        between indicators, so asking for four indicators costs the same upstream
+        traffic as asking for one.
+        
+        Args:
+            crypto (str): Cryptocurrency symbol
+            indicators (list): Dictionaries with a 'name' ('rolling_mean', 'moving_volume',
+                'volatility' or 'sharpe_ratio') and optional 'window' and 'risk_free_rate'
+            period (str): Time period for historical data (e.g., '1mo', '1y')
+            
+        Returns:
+            dict: Mapping of '<name>_<window>' (or 'sharpe_ratio_<risk_free_rate>') to a
+                pandas.Series, or a float for the Sharpe ratio
+        """
+        historical_data = self.get_historical_crypto_data(crypto, period)
+        close = historical_data['Close']
+        returns = close.pct_change(fill_method=None).dropna()
+        rolling = {}
+
+        def rolling_window(column, window):
+            if (column, window) not in rolling:
+                series = returns if column == 'returns' else historical_data[column]
+                rolling[(column, window)] = series.rolling(window=window)
+            return rolling[(column, window)]
+
+        results = {}
+        for indicator in indicators:
+            name = indicator['name']
+            window = indicator.get('window', 30)
+            if name == 'rolling_mean':
+                results[f"{name}_{window}"] = rolling_window('Close', window).mean()
+            elif name == 'moving_volume':
+                results[f"{name}_{window}"] = rolling_window('Volume', window).mean()
+            elif name == 'volatility':
+                results[f"{name}_{window}"] = rolling_window('returns', window).std() * (252 ** 0.5) * 100
+            elif name == 'sharpe_ratio':
+                risk_free_rate = indicator.get('risk_free_rate', 0.02)
+                annual_return = returns.mean() * 252
+                annual_volatility = returns.std() * (252 ** 0.5)
+                results[f"{name}_{risk_free_rate}"] = (annual_return - risk_free_rate) / annual_volatility
+            else:
+                raise ValueError(f"Unknown indicator: {name}")
+        return results
+
+
+    def iter_indicator(self, crypto, indicator, window, period, chunk_size=500):
+        """Calculate a rolling indicator chunk by chunk over the history.
+        
+        Each chunk is computed from its own rows plus the preceding ``window`` rows it
+        depends on, so values match the full-series methods while only one chunk of
+        results is held at a time.
+        
+        Args:
+            crypto (str): Cryptocurrency symbol
+            indicator (str): 'rolling_mean', 'moving_volume' or 'volatility'
+            window (int): Size of the rolling window in days
+            period (str): Time period for historical data (e.g., '1mo', '1y', 'max')
+            chunk_size (int): Number of rows per yielded chunk
+            
+        Yields:
+            pandas.Series: Consecutive chunks of the indicator series
+        """
+        historical_data = self.get_historical_crypto_data(crypto, period)
+        for start in range(0, len(historical_data), chunk_size):
+            rows = historical_data.iloc[max(0, start - window - 1):start + chunk_size]
+            if indicator == 'rolling_mean':
+                values = rows['Close'].rolling(window=window).mean()
+            elif indicator == 'moving_volume':
+                values = rows['Volume'].rolling(window=window).mean()
+            elif indicator == 'volatility':
+                returns = rows['Close'].pct_change(fill_method=None).dropna()
+                values = returns.rolling(window=window).std() * (252 ** 0.5) * 100
+            else:
+                raise ValueError(f"Unknown indicator: {indicator}")
+            yield values[values.index >= historical_data.index[start]]
+
+    @staticmethod
+    def validate_batch(cryptos, indicators):
+        """Check a batch request before any history is fetched.
+        
+        Args:
+            cryptos (list): Cryptocurrency symbols
+            indicators (list): Indicator specifications, see indicator_bundle
+            
+        Raises:
+            ValueError: If there are more than ANALYTICS_BATCH_MAX_SYMBOLS distinct symbols
+                or an indicator name is unknown
+        """
+        count = len(set(cryptos))
+        if count > ANALYTICS_BATCH_MAX_SYMBOLS:
+            raise ValueError(f"Too many symbols: {count}, at most {ANALYTICS_BATCH_MAX_SYMBOLS} per batch")
+        unknown = [indicator['name'] for indicator in indicators if indicator['name'] not in Analytics.BUNDLE_INDICATORS]
+        if unknown:
+            raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+    def batch_indicators(self, cryptos, indicators, period='1y'):
+        """Calculate the same indicators for many cryptocurrencies in parallel.
+        
+        Histories are fetched concurrently on a module-level thread pool of
+        ANALYTICS_BATCH_WORKERS threads shared by all batches, and each symbol is
+        computed with indicator_bundle. A failure for one symbol does not affect
+        the others.
+        
+        Args:
+            cryptos (list): Cryptocurrency symbols
+            indicators (list): Indicator specifications, see indicator_bundle
+            period (str): Time period for historical data (e.g., '1mo', '1y')
+            
+        Returns:
+            dict: Mapping of symbol to {'indicators': results} or {'error': message}
+            
+        Raises:
+            ValueError: If the request fails validate_batch
+        """
+        self.validate_batch(cryptos, indicators)
+        cryptos = list(dict.fromkeys(cryptos))
+
+        def compute(crypto):
+            try:
+                return {"indicators": self.indicator_bundle(crypto, indicators, period)}
+            except Exception as e:
+                return {"error": str(e)}
+
+        return dict(zip(cryptos, _batch_executor.map(compute, cryptos)))
+
+    def get_bulk_closes(self, cryptos, period='1y'):
+        """Retrieve aligned closing prices for several cryptocurrencies in one download.
+        
+        Args:
+            cryptos (list): Cryptocurrency symbols
+            period (str): Time period for historical data (e.g., '1mo', '1y')
+            
+        Returns:
+            pandas.DataFrame: One column of closing prices per symbol, named as passed in
+                and restricted to the dates where every column has a price. Symbols
+                without any price are left out.
+        """
+        data = yf.download(tickers=list(cryptos), period=period, group_by='column', progress=False)
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(cryptos[0])
+        # yfinance upper-cases tickers, map its columns back to the symbols we were given
+        columns = {str(column).upper(): column for column in closes.columns}
+        available = [crypto for crypto in cryptos if crypto.upper() in columns]
+        closes = closes[[columns[crypto.upper()] for crypto in available]]
+        closes.columns = available
+        return closes.dropna(axis=1, how='all').dropna()
+
+    def portfolio_risk(self, holdings, risk_free_rate=0.02, period='1y'):
+        """Calculate portfolio-level risk metrics with matrix operations.
+        
+        Weights are each holding's share of the portfolio value at the latest close.
+        Holdings without price history are left out and listed under 'missing', and
+        metrics that are undefined (e.g. zero variance or zero portfolio value) are None.
+        
+        Args:
+            holdings (list): Dictionaries with 'asset' and 'quantity', as returned by
+                PortfolioRepository.fetch_user_assets
+            risk_free_rate (float): Risk-free rate (default: 2%)
+            period (str): Time period for historical data
+            
+        Returns:
+            dict: Assets, missing assets, weights, annualized covariance and correlation
+                matrices, portfolio annual return, volatility and Sharpe ratio
+                
+        Raises:
+            ValueError: If fewer than two common closes exist for the priced holdings
+        """
+        quantities = {}
+        for holding in holdings:
+            quantities[holding['asset']] = quantities.get(holding['asset'], 0) + holding['quantity']
+        closes = self.get_bulk_closes(list(quantities), period)
+        assets = list(closes.columns)
+        missing = [asset for asset in quantities if asset not in assets]
+        if not assets or len(closes) < 2:
+            raise ValueError(f"Not enough price history to compute risk for: {', '.join(quantities)}")
+        prices = closes.to_numpy()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices[1:] / prices[:-1] - 1
+            values = prices[-1] * np.array([quantities[asset] for asset in assets])
+            weights = values / values.sum()
+
+            covariance = np.atleast_2d(np.cov(returns, rowvar=False)) * 252
+            std = np.sqrt(np.diag(covariance))
+            correlation = covariance / np.outer(std, std)
+            annual_return = float(returns.mean(axis=0) @ weights * 252)
+            volatility = float(np.sqrt(weights @ covariance @ weights))
+            sharpe_ratio = (annual_return - risk_free_rate) / volatility if volatility else math.nan
+
+        return {
+            "assets": assets,
+            "missing": missing,
+            "weights": nan_to_none(weights.tolist()),
+            "covariance": nan_to_none(covariance.tolist()),
+            "correlation": nan_to_none(correlation.tolist()),
+            "annual_return": nan_to_none(annual_return),
+            "volatility": nan_to_none(volatility),
+            "sharpe_ratio": nan_to_none(sharpe_ratio)
+        }
+
+def nan_to_none(value):
+    """Replace NaN and infinite floats, also inside nested lists, with None so the value is valid JSON."""
+    if isinstance(value, list):
+        return [nan_to_none(item) for item in value]
+    return None if value is None or not math.isfinite(value) else float(value)
+
+class RollingWindow:
+    """Running mean and sample standard deviation over the last ``window`` values.
+    
+    Each push is O(1): the mean uses a running sum and the variance uses Welford's
+    algorithm, with the value leaving the window removed by reversing its update.
+    NaN values are counted rather than added to the statistics, and like pandas
+    rolling() the window reports NaN while it still holds one of them.
+    """
+
+    def __init__(self, window):
+        """Initialize an empty window.
+        
+        Args:
+            window (int): Number of most recent values the statistics cover
+        """
+        self.window = window
+        self.values = deque()
+        self.nan_count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add(self, value):
+        count = len(self.values) - self.nan_count
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / count
+        self.m2 += delta * (value - self.mean)
+
+    def _remove(self, value):
+        count = len(self.values) - self.nan_count
+        if count == 0:
+            # Start from exact zeros instead of carrying rounding error forward
+            self.total = self.mean = self.m2 = 0.0
+            return
+        self.total -= value
+        delta = value - self.mean
+        self.mean -= delta / count
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+
+    def push(self, value):
+        """Add a value, dropping the oldest one once the window is full.
+        
+        Args:
+            value (float): New value, NaN for a missing one
+        """
+        self.values.append(value)
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self._add(value)
+        if len(self.values) > self.window:
+            oldest = self.values.popleft()
+            if math.isnan(oldest):
+                self.nan_count -= 1
+            else:
+                self._remove(oldest)
+
+    def is_full(self):
+        """Return True once the window holds ``window`` values."""
+        return len(self.values) == self.window
+
+    def is_valid(self):
+        """Return True once the window holds ``window`` values and none of them is NaN."""
+        return self.is_full() and self.nan_count == 0
+
+    def get_mean(self):
+        """Return the mean of the window, NaN until it holds ``window`` non-NaN values."""
+        return self.total / self.window if self.is_valid() else math.nan
+
+    def get_std(self):
+        """Return the sample standard deviation of the window, NaN until it holds ``window`` non-NaN values."""
+        if not self.is_valid() or self.window < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.window - 1))
+
+    def snapshot(self):
+        """Return the window state as a JSON-serializable dictionary."""
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuild a window from a snapshot().
+        
+        Args:
+            state (dict): State returned by snapshot()
+            
+        Returns:
+            RollingWindow: Window with the same values and statistics
+        """
+        rolling = cls(state["window"])
+        for value in state["values"]:
+            rolling.push(value)
+        return rolling
+
+
+class IncrementalAnalytics:
+    """Incremental indicator engine for streaming price bars.
+    
+    Keeps running state per (symbol, indicator, window) so that appending one bar
+    updates every tracked indicator in O(1), giving the same values as the pandas
+    based rolling_mean, moving_volume and calculate_volatility methods of Analytics.
+    """
+
+    INDICATORS = ('rolling_mean', 'moving_volume', 'volatility')
+
+    def __init__(self):
+        """Initialize the engine with no tracked indicators."""
+        # crypto -> {(indicator, window): RollingWindow}, so an update only visits its own symbol
+        self.windows = {}
+        self.last_close = {}
+
+    def track(self, crypto, indicator, window):
+        """Start tracking an indicator for a cryptocurrency.
+        
+        Args:
+            crypto (str): Cryptocurrency symbol
+            indicator (str): 'rolling_mean', 'moving_volume' or 'volatility'
+            window (int): Rolling window size in bars
+        """
+        if indicator not in self.INDICATORS:
+            raise ValueError(f"Unknown indicator: {indicator}")
+        self.windows.setdefault(crypto, {}).setdefault((indicator, window), RollingWindow(window))
+
+    def update(self, crypto, close, volume):
+        """Append one bar for a cryptocurrency and update its tracked indicators.
+        
+        Args:
+            crypto (str): Cryptocurrency symbol
+            close (float): Closing price of the new bar, NaN if missing
+            volume (float): Trading volume of the new bar, NaN if missing
             
+        Returns:
+            dict: Mapping of (indicator, window) to the latest indicator value
+        """
+        previous = self.last_close.get(crypto)
+        self.last_close[crypto] = close
+        # Analytics drops the NaN returns on either side of a missing close, so skip them too
+        has_return = previous is not None and not math.isnan(previous) and not math.isnan(close)
+        results = {}
+        for (indicator, window), rolling in self.windows.get(crypto, {}).items():
+            if indicator == 'rolling_mean':
+                rolling.push(close)
+                results[(indicator, window)] = rolling.get_mean()
+            elif indicator == 'moving_volume':
+                rolling.push(volume)
+                results[(indicator, window)] = rolling.get_mean()
+            else:
+                if has_return:
+                    rolling.push(close / previous - 1)
+                results[(indicator, window)] = rolling.get_std() * (252 ** 0.5) * 100
+        return results
 
+    def seed(self, crypto, historical_data):
+        """Prime the tracked indicators of a cryptocurrency from historical bars.
+        
+        Args:
+            crypto (str): Cryptocurrency symbol
+            historical_data (pandas.DataFrame): Bars with 'Close' and 'Volume' columns
+            
+        Returns:
+            dict: Indicator values after the last bar
+        """
+        results = {}
+        for close, volume in zip(historical_data['Close'], historical_data['Volume']):
+            results = self.update(crypto, float(close), float(volume))
+        return results
 
+    def snapshot(self):
+        """Return the engine state as a JSON-serializable dictionary."""
+        return {
+            "windows": [
+                {"crypto": crypto, "indicator": indicator, "state": rolling.snapshot()}
+                for crypto, windows in self.windows.items()
+                for (indicator, _), rolling in windows.items()
+            ],
+            "last_close": dict(self.last_close)
+        }
 
+    @classmethod
+    def restore(cls, state):
+        """Rebuild an engine from a snapshot().
+        
+        Args:
+            state (dict): State returned by snapshot()
+            
+        Returns:
+            IncrementalAnalytics: Engine continuing exactly where the snapshot left off
+        """
+        engine = cls()
+        for entry in state["windows"]:
+            rolling = RollingWindow.restore(entry["state"])
+            engine.windows.setdefault(entry["crypto"], {})[(entry["indicator"], rolling.window)] = rolling
+        engine.last_close = dict(state["last_close"])
+        return engine
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from models.crypto_asset import CryptoAsset, FetchAPI, price_cache, take_hot_symbols
+from utils.executor import run_blocking
+
+
+class PriceRefresher:
+    """Background scheduler that keeps the most requested symbols in the price cache.
+
+    Every ``interval`` seconds the ``top_n`` most requested symbols, plus any symbols
+    reported by ``symbol_sources``, are re-priced with a single bulk request and
+    written into the shared price cache, so requests for hot symbols are answered
+    from memory and only cold symbols touch the network. The interval should be
+    shorter than PRICE_CACHE_TTL to keep hot entries fresh.
+    """
+
+    def __init__(self, fetch_api=None, interval=4.0, top_n=50):
+        """Initialize the refresher.
+
+        Args:
+            fetch_api (FetchAPI, optional): API used for bulk price requests.
+                If None, a new FetchAPI instance will be created. Defaults to None.
+            interval (float): Seconds between refreshes
+            top_n (int): Maximum number of symbols refreshed per cycle
+        """
+        self.fetch_api = fetch_api or FetchAPI()
+        self.interval = interval
+        self.top_n = top_n
+        self.last_refresh = None
+        self.last_error = None
+        self.refreshed_symbols = []
+        self.listeners = []
+        self.symbol_sources = []
+        self._task = None
+
+    def refresh_once(self):
+        """Re-price the hot symbols with one bulk request and store them in the cache.
+        
+        Listeners are called with the new prices afterwards.
+
+        Returns:
+            dict: Mapping of symbol to refreshed price, for the symbols that got one
+        """
+        symbols = take_hot_symbols(self.top_n)
+        for source in self.symbol_sources:
+            symbols.extend(symbol for symbol in source() if symbol not in symbols)
+        if not symbols:
+            return {}
+        # Symbols missing from the response keep their cached price and are not pushed
+        prices = CryptoAsset.extract_prices(symbols, self.fetch_api.get_bulk_prices(symbols))
+        price_cache.set_many({symbol.lower(): price for symbol, price in prices.items()})
+        self.refreshed_symbols = symbols
+        self.last_refresh = time.time()
+        for listener in self.listeners:
+            listener(prices)
+        return prices
+
+    async def run(self):
+        """Refresh hot symbols forever on a fixed cadence."""
+        while True:
+            try:
+                await run_blocking(self.refresh_once)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error refreshing prices: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the refresh loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Cancel the refresh loop and wait for it to finish."""
+        task, self._task = self._task, None
+        # Cleared before waiting, so a start() while the old loop winds down begins a new one
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def get_status(self):
+        """Report how fresh the pre-fetched prices are.
+
+        Returns:
+            dict: Running state, settings, seconds since the last refresh and the
+                cache age of every refreshed symbol
+        """
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "top_n": self.top_n,
+            "seconds_since_refresh": None if self.last_refresh is None else time.time() - self.last_refresh,
+            "last_error": self.last_error,
+            "symbol_ages": {symbol: price_cache.age(symbol.lower()) for symbol in self.refreshed_symbols}
+        }
+
+
+price_refresher = PriceRefresher(
+    interval=float(os.getenv("PRICE_REFRESH_INTERVAL", "4")),
+    top_n=int(os.getenv("PRICE_REFRESH_TOP_N", "50"))
+)
+
+
+def refresher_enabled():
+    """Return True if PRICE_REFRESHER_ENABLED asks for the refresher to run for the app's lifetime."""
+    return os.getenv("PRICE_REFRESHER_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def refresher_lifespan(app):
+    """FastAPI lifespan that runs the price refresher when PRICE_REFRESHER_ENABLED is set."""
+    if refresher_enabled():
+        price_refresher.start()
+    try:
+        yield
+    finally:
+        # The refresher may also have been started on demand, e.g. by a live feed
+        await price_refresher.stop()
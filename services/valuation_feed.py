@@ -0,0 +1,138 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from services.price_refresher import price_refresher
+
+# Most deltas queued for one subscriber; beyond that queued deltas are merged into one
+VALUATION_QUEUE_MAX_SIZE = int(os.getenv("VALUATION_QUEUE_MAX_SIZE", "32"))
+
+
+class ValuationSubscription:
+    """One subscriber's holdings, last pushed values and queue of pending deltas."""
+
+    def __init__(self, holdings, loop):
+        """Initialize a subscription.
+
+        Args:
+            holdings (list): Dictionaries with 'asset', 'quantity' and 'value', as in
+                Portfolio.valuation_snapshot()['assets']
+            loop (asyncio.AbstractEventLoop): Loop the subscriber's websocket runs on
+        """
+        self.quantities = {holding['asset']: holding['quantity'] for holding in holdings}
+        self.values = {holding['asset']: holding['value'] for holding in holdings}
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=VALUATION_QUEUE_MAX_SIZE)
+
+    def total(self):
+        """Return the current total value of the subscribed holdings."""
+        return sum(self.values.values())
+
+    def push(self, delta):
+        """Queue a delta for the subscriber. Must be called on the subscriber's loop.
+
+        When a slow subscriber's queue is full, the queued deltas are dropped and
+        merged with the new one into a single delta, so memory stays bounded and
+        the subscriber still receives every changed asset value and the latest total.
+
+        Args:
+            delta (dict): 'assets' mapping symbol to new value, and 'total_value'
+        """
+        if self.queue.full():
+            assets = {}
+            while not self.queue.empty():
+                assets.update(self.queue.get_nowait()["assets"])
+            delta = {"assets": {**assets, **delta["assets"]}, "total_value": delta["total_value"]}
+        self.queue.put_nowait(delta)
+
+
+class ValuationFeed:
+    """Fans price ticks out to the portfolios holding each symbol.
+
+    Subscriptions are indexed by symbol, so a tick only touches the subscribers that
+    hold the symbols whose price changed, and each subscriber receives only the asset
+    values that changed plus its new total.
+    """
+
+    def __init__(self):
+        """Initialize the feed with no subscribers."""
+        self._by_symbol = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, holdings, loop):
+        """Register a portfolio for live valuation deltas.
+
+        Args:
+            holdings (list): Valued holdings, see ValuationSubscription
+            loop (asyncio.AbstractEventLoop): Loop the subscriber runs on
+
+        Returns:
+            ValuationSubscription: Subscription whose queue receives the deltas
+        """
+        subscription = ValuationSubscription(holdings, loop)
+        with self._lock:
+            for symbol in subscription.quantities:
+                self._by_symbol[symbol].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop sending deltas to a subscription.
+
+        Args:
+            subscription (ValuationSubscription): Subscription returned by subscribe()
+        """
+        with self._lock:
+            for symbol in subscription.quantities:
+                subscribers = self._by_symbol.get(symbol)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_symbol[symbol]
+
+    def symbols(self):
+        """Return every symbol held by at least one subscriber."""
+        with self._lock:
+            return list(self._by_symbol)
+
+    def publish(self, prices):
+        """Push changed asset values and new totals to affected subscribers.
+
+        Safe to call from any thread, e.g. as a PriceRefresher listener.
+
+        Args:
+            prices (dict): Mapping of symbol to its latest price
+        """
+        changes = defaultdict(dict)
+        with self._lock:
+            for symbol, price in prices.items():
+                for subscription in self._by_symbol.get(symbol, ()):
+                    value = subscription.quantities[symbol] * price
+                    if value != subscription.values.get(symbol):
+                        subscription.values[symbol] = value
+                        changes[subscription][symbol] = value
+            deltas = [
+                (subscription, {"assets": changed, "total_value": subscription.total()})
+                for subscription, changed in changes.items()
+            ]
+        for subscription, delta in deltas:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, delta)
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                pass
+
+    def get_stats(self):
+        """Report how many symbols and subscriptions the feed is tracking.
+
+        Returns:
+            dict: Number of symbols and of distinct subscriptions
+        """
+        with self._lock:
+            subscriptions = set().union(*self._by_symbol.values()) if self._by_symbol else set()
+            return {"symbols": len(self._by_symbol), "subscriptions": len(subscriptions)}
+
+
+valuation_feed = ValuationFeed()
+# Keep subscribed symbols refreshed and push every refresh to the subscribers
+price_refresher.listeners.append(valuation_feed.publish)
+price_refresher.symbol_sources.append(valuation_feed.symbols)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Tests run offline: select the SQLite backend before database.db is imported so no
+# Supabase client is created, and make the project root importable.
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """A fresh in-memory SQLite database installed as db.storage for one test."""
+    from database import db
+    from database.sqlite_backend import SQLiteStorage
+    from repositories.user_repository import user_cache
+
+    monkeypatch.setattr(db, "storage", SQLiteStorage(":memory:"))
+    user_cache.clear()
+    yield db.storage
+    user_cache.clear()
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import analytics_routes
+from benchmarks.stand_ins import install
+from services import analytics
+
+
+@pytest.fixture(scope="module")
+def client():
+    with install():
+        yield TestClient(analytics_routes.app)
+
+
+def test_unknown_indicators_are_rejected_up_front(client):
+    response = client.post("/analytics/batch", json={
+        "symbols": ["btc", "eth"],
+        "indicators": [{"name": "rolling_mean"}, {"name": "macd"}]
+    })
+    assert response.status_code == 400
+    assert "macd" in response.json()["detail"]
+
+
+def test_symbol_count_is_capped(client, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_BATCH_MAX_SYMBOLS", 3)
+    body = {"indicators": [{"name": "rolling_mean", "window": 5}], "period": "1mo"}
+    assert client.post("/analytics/batch", json={**body, "symbols": ["a", "b", "c", "d"]}).status_code == 400
+    # Duplicates count once
+    response = client.post("/analytics/batch", json={**body, "symbols": ["btc", "eth", "sol", "btc"]})
+    assert response.status_code == 200
+    assert sorted(response.json()["results"]) == ["btc", "eth", "sol"]
+
+
+def test_batches_share_one_pool(client):
+    body = {"symbols": ["btc", "eth", "sol"], "indicators": [{"name": "volatility", "window": 5}], "period": "1mo"}
+    for _ in range(3):
+        assert client.post("/analytics/batch", json=body).status_code == 200
+    pools = {thread.name.rsplit("_", 1)[0] for thread in threading.enumerate() if thread.name.startswith("analytics-batch")}
+    assert pools == {"analytics-batch"}
+    assert sum(thread.name.startswith("analytics-batch") for thread in threading.enumerate()) <= analytics.ANALYTICS_BATCH_WORKERS
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from utils import executor
+from utils.executor import iterate_blocking, run_blocking
+
+
+def test_blocking_calls_run_concurrently_without_stalling_the_loop():
+    calls = 16
+    delay = 0.1
+
+    async def scenario():
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        await asyncio.gather(*(run_blocking(time.sleep, delay) for _ in range(calls)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await beat
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(scenario())
+    # Serial execution would take calls * delay = 1.6 s
+    assert elapsed < calls * delay / 4
+    # The event loop kept running while the blocking calls slept
+    assert ticks >= 5
+
+
+def test_route_throughput_scales_with_concurrency():
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await run_blocking(time.sleep, 0.05)
+        return {"ok": True}
+
+    async def scenario(concurrency, requests):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = iter(range(requests))
+
+            async def worker():
+                for _ in pending:
+                    response = await client.get("/slow")
+                    assert response.status_code == 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return requests / (time.perf_counter() - start)
+
+    serial = asyncio.run(scenario(1, 10))
+    concurrent = asyncio.run(scenario(16, 64))
+    assert concurrent > serial * 5
+
+
+def test_iterate_blocking_runs_each_step_on_the_executor():
+    threads = []
+
+    def chunks():
+        for i in range(3):
+            threads.append(threading.current_thread().name)
+            yield i
+
+    async def collect():
+        return [item async for item in iterate_blocking(chunks())]
+
+    submitted = executor.get_executor_stats()["submitted"]
+    assert asyncio.run(collect()) == [0, 1, 2]
+    assert all(name.startswith("blocking") for name in threads)
+    # One call to create the iterator plus one per item and one for the end
+    assert executor.get_executor_stats()["submitted"] - submitted == 5
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+import yfinance as yf
+from fastapi.testclient import TestClient
+
+from api.routes import analytics_routes
+from repositories import history_repository
+from repositories.history_repository import HistoryRepository
+
+
+class FakeTicker:
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, period=None, interval="1d", start=None, **kwargs):
+        index = pd.date_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=40, freq="D", name="Date")
+        return pd.DataFrame({"Close": range(1, 41), "Volume": range(40)}, index=index, dtype=float)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_repository, "HISTORY_DIR", str(tmp_path / "history"))
+    monkeypatch.setattr(yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(HistoryRepository, "_frames", type(HistoryRepository._frames)())
+    monkeypatch.setattr(HistoryRepository, "_meta", {})
+    return tmp_path
+
+
+@pytest.mark.parametrize("symbol", ["../../tmp/pwned", "btc/eth", "", "a" * 21, "btc usd"])
+def test_unsafe_symbols_are_rejected(store, symbol):
+    with pytest.raises(ValueError):
+        HistoryRepository.get_history(symbol, "1mo")
+    assert not any(store.rglob("*.parquet"))
+
+
+def test_valid_symbols_are_stored_inside_history_dir(store):
+    frame = HistoryRepository.get_history("BTC-USD", "1mo")
+    assert not frame.empty
+    assert [path.name for path in store.rglob("*.parquet")] == ["BTC-USD_1d.parquet"]
+
+
+def test_routes_answer_400_for_unsafe_symbols(store):
+    client = TestClient(analytics_routes.app)
+    response = client.post("/analytics/batch", json={
+        "symbols": ["btc", "../../../../tmp/pwned"],
+        "indicators": [{"name": "rolling_mean"}]
+    })
+    assert response.status_code == 400
+    assert client.get("/analytics/..%2F..%2Fpwned/rolling_mean?window=3&period=1mo").status_code in (400, 404)
+    assert not any(store.rglob("*.parquet"))
+
+
+def test_frames_in_memory_are_bounded(store, monkeypatch):
+    monkeypatch.setattr(history_repository, "HISTORY_MEMORY_MAX_SIZE", 3)
+    for i in range(10):
+        HistoryRepository.get_history(f"coin{i}", "1mo")
+    assert list(HistoryRepository._frames) == [(f"coin{i}", "1d") for i in (7, 8, 9)]
+    assert set(HistoryRepository._meta) == set(HistoryRepository._frames)
+    # Evicted symbols are reloaded from disk rather than fetched again
+    assert not HistoryRepository.get_history("coin0", "1mo").empty
+    assert HistoryRepository.get_stats()["full_fetches"] >= 10
+
+
+def test_unknown_periods_are_rejected_before_the_cache(store):
+    HistoryRepository.get_history("btc", "1mo")
+    requests = HistoryRepository.get_stats()["requests"]
+    with pytest.raises(ValueError, match="Unsupported period"):
+        HistoryRepository.get_history("btc", "bogus")
+    assert HistoryRepository.get_stats()["requests"] == requests
+
+
+@pytest.mark.parametrize("path", [
+    "/analytics/btc/sharpe_ratio?period=bogus",
+    "/analytics/btc/volatility?period=bogus&format=ndjson",
+    "/analytics/btc/rolling_mean?window=3&period=bogus&format=sse",
+    "/analytics/users/alice/risk?period=bogus"
+])
+def test_routes_answer_400_for_unknown_periods(store, path):
+    HistoryRepository.get_history("btc", "1mo")
+    response = TestClient(analytics_routes.app).get(path)
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
@@ -0,0 +1,88 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.analytics import Analytics, IncrementalAnalytics, RollingWindow
+
+
+def bars(length=200, seed=7, missing=()):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.03, length))),
+        "Volume": rng.integers(10 ** 6, 10 ** 9, length).astype(float)
+    })
+    frame.loc[list(missing), ["Close", "Volume"]] = np.nan
+    return frame
+
+
+def expected(frame, indicator, window, monkeypatch):
+    # The batch Analytics methods themselves, fed the same bars
+    analytics = Analytics()
+    monkeypatch.setattr(analytics, "get_historical_crypto_data", lambda crypto, period: frame)
+    if indicator == "rolling_mean":
+        return analytics.rolling_mean("btc", window, "1y")
+    if indicator == "moving_volume":
+        return analytics.moving_volume("btc", window, "1y")
+    return analytics.calculate_volatility("btc", "1y", window)
+
+
+def streamed(frame, indicator, window):
+    engine = IncrementalAnalytics()
+    engine.track("btc", indicator, window)
+    values = [engine.update("btc", close, volume)[(indicator, window)]
+              for close, volume in zip(frame["Close"], frame["Volume"])]
+    return pd.Series(values, index=frame.index)
+
+
+def assert_matches(actual, reference):
+    assert len(actual) == len(reference)
+    for got, want in zip(actual, reference):
+        if math.isnan(want):
+            assert math.isnan(got)
+        else:
+            assert got == pytest.approx(want, rel=1e-9)
+
+
+@pytest.mark.parametrize("indicator", IncrementalAnalytics.INDICATORS)
+@pytest.mark.parametrize("window", [1, 3, 20])
+@pytest.mark.parametrize("missing", [(), (0,), (10,), (10, 11, 40), (50, 53)])
+def test_matches_pandas(indicator, window, missing, monkeypatch):
+    frame = bars(missing=missing)
+    actual = streamed(frame, indicator, window)
+    reference = expected(frame, indicator, window, monkeypatch)
+    if indicator == "volatility":
+        # Analytics drops the undefined returns, so compare on the bars that produced one
+        actual = actual.loc[reference.index]
+    assert_matches(actual, reference)
+
+
+def test_nan_leaves_the_window():
+    rolling = RollingWindow(3)
+    for value in [1.0, float("nan"), 4.0, 5.0, 6.0, 7.0, 8.0]:
+        rolling.push(value)
+    assert rolling.get_mean() == 7.0
+    assert rolling.get_std() == pytest.approx(1.0)
+    assert pd.Series([1.0, float("nan"), 4.0, 5.0, 6.0, 7.0, 8.0]).rolling(3).mean().iloc[-1] == 7.0
+
+
+def test_updates_only_visit_the_symbol():
+    engine = IncrementalAnalytics()
+    engine.track("btc", "rolling_mean", 2)
+    engine.track("eth", "rolling_mean", 2)
+    engine.update("btc", 1.0, 1.0)
+    assert engine.update("btc", 3.0, 1.0) == {("rolling_mean", 2): 2.0}
+    assert math.isnan(engine.update("eth", 5.0, 1.0)[("rolling_mean", 2)])
+
+
+def test_snapshot_restore_continues_the_stream():
+    frame = bars(missing=(30,))
+    engine = IncrementalAnalytics()
+    for indicator in IncrementalAnalytics.INDICATORS:
+        engine.track("btc", indicator, 5)
+    engine.seed("btc", frame.iloc[:100])
+    restored = IncrementalAnalytics.restore(json.loads(json.dumps(engine.snapshot())))
+    for close, volume in zip(frame["Close"].iloc[100:], frame["Volume"].iloc[100:]):
+        assert restored.update("btc", close, volume) == pytest.approx(engine.update("btc", close, volume))
@@ -0,0 +1,126 @@
+import pytest
+
+from benchmarks.stand_ins import CallCounter, CountingStorage
+from database import db
+from models.crypto_asset import FetchAPI
+from models.portfolio import Portfolio
+from models.user import User
+
+
+@pytest.fixture
+def calls(storage, monkeypatch):
+    calls = CallCounter()
+    monkeypatch.setattr(db, "storage", CountingStorage(storage, calls))
+    return calls
+
+
+@pytest.fixture
+def user(storage):
+    row = storage.insert_user("alice", "alice@example.com", 30)
+    storage.upsert_asset(row["id"], "btc", 10)
+    storage.upsert_asset(row["id"], "eth", 5)
+    return User(id=row["id"], name=row["name"], email=row["email"], age=row["age"])
+
+
+def holdings(storage, user):
+    return {row["asset"]: row["quantity"] for row in storage.fetch_user_assets(user.id)}
+
+
+def test_holdings_are_loaded_once_up_front(user, calls):
+    portfolio = Portfolio(user)
+    assert calls.snapshot() == {"storage:fetch_user_assets": 1}
+    portfolio.check_quantity("btc")
+    portfolio.fetch_singular_asset("eth")
+    portfolio.fetch_user_assets()
+    assert calls.snapshot() == {"storage:fetch_user_assets": 1}
+
+
+def test_lazy_portfolio_loads_on_first_read(user, calls):
+    portfolio = Portfolio(user, lazy=True)
+    assert calls.snapshot() == {}
+    assert portfolio.check_quantity("btc") == 10
+    assert calls.snapshot() == {"storage:fetch_user_assets": 1}
+
+
+def test_fetch_api_argument_is_kept(user):
+    fetch_api = FetchAPI()
+    assert Portfolio(user, fetch_api).fetch_api is fetch_api
+
+
+def test_deferred_changes_flush_in_one_batch(storage, user, calls):
+    portfolio = Portfolio(user)
+    portfolio.add_asset("btc", 2, defer=True)
+    portfolio.remove_asset("eth", 1, defer=True)
+    portfolio.add_asset("sol", 3, defer=True)
+    portfolio.add_asset("btc", 1, defer=True)
+    # Reads see the deferred changes before anything is written
+    assert portfolio.check_quantity("btc") == 13
+    assert portfolio.is_dirty()
+    assert holdings(storage, user) == {"btc": 10, "eth": 5}
+
+    rows = portfolio.flush()
+    assert sorted((row["asset"], row["quantity"]) for row in rows) == [("btc", 13), ("eth", 4), ("sol", 3)]
+    assert not portfolio.is_dirty()
+    assert holdings(storage, user) == {"btc": 13, "eth": 4, "sol": 3}
+    assert calls.snapshot()["storage:apply_asset_deltas"] == 1
+    assert portfolio.flush() == []
+
+
+def test_deferred_removal_beyond_holdings_is_refused(storage, user):
+    portfolio = Portfolio(user)
+    assert portfolio.remove_asset("eth", 6, defer=True) is None
+    assert not portfolio.is_dirty()
+    assert portfolio.check_quantity("eth") == 5
+
+
+def test_rejected_flush_keeps_pending_changes(storage, user):
+    portfolio = Portfolio(user)
+    portfolio.remove_asset("btc", 5, defer=True)
+    portfolio.add_asset("eth", 1, defer=True)
+    # Another writer spends most of the balance before the flush
+    storage.adjust_asset_quantity(user.id, "btc", -8)
+
+    assert portfolio.flush() is None
+    assert portfolio.is_dirty()
+    assert portfolio.pending == {"btc": -5, "eth": 1}
+    # The whole batch was rejected, including the valid eth change
+    assert holdings(storage, user) == {"btc": 2, "eth": 5}
+
+    storage.adjust_asset_quantity(user.id, "btc", 8)
+    assert portfolio.flush() is not None
+    assert not portfolio.is_dirty()
+    assert holdings(storage, user) == {"btc": 5, "eth": 6}
+
+
+def test_from_user_name_loads_user_and_holdings_in_one_query(user, calls):
+    portfolio = Portfolio.from_user_name("alice")
+    assert (portfolio.user_id, portfolio.name, portfolio.user.email, portfolio.user.age) == (user.id, "alice", "alice@example.com", 30)
+    assert sorted(portfolio.fetch_user_assets(), key=lambda row: row["asset"]) == [
+        {"asset": "btc", "quantity": 10}, {"asset": "eth", "quantity": 5}
+    ]
+    assert portfolio.check_quantity("eth") == 5
+    assert calls.snapshot() == {"storage:fetch_user_with_assets": 1}
+
+
+def test_from_user_name_loads_user_without_holdings(storage, calls):
+    storage.insert_user("bob", "bob@example.com", 40)
+    portfolio = Portfolio.from_user_name("bob")
+    assert portfolio is not None
+    assert portfolio.name == "bob"
+    assert portfolio.fetch_user_assets() == []
+    assert calls.snapshot() == {"storage:fetch_user_with_assets": 1}
+
+
+def test_from_user_name_returns_none_for_unknown_user(user):
+    assert Portfolio.from_user_name("nobody") is None
+
+
+def test_fetch_user_with_assets_rows(storage, user):
+    storage.insert_user("bob", "bob@example.com", 40)
+    alice = storage.fetch_user_with_assets("alice")
+    assert sorted(alice.pop("portfolio"), key=lambda row: row["asset"]) == [
+        {"asset": "btc", "quantity": 10}, {"asset": "eth", "quantity": 5}
+    ]
+    assert alice == {"id": user.id, "name": "alice", "email": "alice@example.com", "age": 30}
+    assert storage.fetch_user_with_assets("bob")["portfolio"] == []
+    assert storage.fetch_user_with_assets("nobody") is None
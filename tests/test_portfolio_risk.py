@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf
+
+from benchmarks.stand_ins import CallCounter, YFinanceStandIn
+from services.analytics import Analytics
+
+
+@pytest.fixture
+def download(monkeypatch):
+    stand_in = YFinanceStandIn(CallCounter())
+    overrides = {}
+
+    def fake_download(tickers, **kwargs):
+        # Unknown tickers come back from yfinance as all-NaN columns
+        data = stand_in.download([ticker for ticker in tickers if ticker.upper() not in overrides], **kwargs)
+        for ticker, values in overrides.items():
+            for field in ("Close", "High", "Low", "Open", "Volume"):
+                data[(field, ticker)] = values(data.index)
+        return data
+
+    monkeypatch.setattr(yf, "download", fake_download)
+    return overrides
+
+
+def test_bulk_closes_keep_the_symbols_passed_in(download):
+    closes = Analytics().get_bulk_closes(["btc", "Eth"], "1mo")
+    assert list(closes.columns) == ["btc", "Eth"]
+    assert not closes.empty
+
+
+def test_unknown_holdings_are_reported_as_missing(download):
+    download["NOPE"] = lambda index: np.nan
+    risk = Analytics().portfolio_risk(
+        [{"asset": "btc", "quantity": 1}, {"asset": "nope", "quantity": 2}, {"asset": "eth", "quantity": 3}], period="3mo"
+    )
+    assert risk["assets"] == ["btc", "eth"]
+    assert risk["missing"] == ["nope"]
+    assert sum(risk["weights"]) == pytest.approx(1)
+    json.dumps(risk, allow_nan=False)
+
+
+def test_no_usable_history_raises_value_error(download):
+    download["NOPE"] = lambda index: np.nan
+    with pytest.raises(ValueError):
+        Analytics().portfolio_risk([{"asset": "nope", "quantity": 1}], period="3mo")
+
+
+def test_undefined_metrics_are_none(download):
+    download["FLAT"] = lambda index: 1.0
+    risk = Analytics().portfolio_risk([{"asset": "flat", "quantity": 1}, {"asset": "btc", "quantity": 1}], period="3mo")
+    assert risk["covariance"][0] == [0.0, 0.0]
+    assert risk["correlation"][0] == [None, None]
+    assert risk["correlation"][1][1] == pytest.approx(1)
+    json.dumps(risk, allow_nan=False)
+
+    risk = Analytics().portfolio_risk([{"asset": "btc", "quantity": 0}, {"asset": "eth", "quantity": 0}], period="3mo")
+    assert risk["weights"] == [None, None]
+    assert risk["sharpe_ratio"] is None
+    json.dumps(risk, allow_nan=False)
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import portfolio_routes
+
+
+@pytest.fixture
+def client(storage):
+    return TestClient(portfolio_routes.app)
+
+
+@pytest.fixture
+def alice(storage):
+    user = storage.insert_user("alice", "alice@example.com", 30)
+    storage.upsert_asset(user["id"], "btc", 10)
+    storage.upsert_asset(user["id"], "eth", 5)
+    return user
+
+
+def holdings(storage, user):
+    return {row["asset"]: row["quantity"] for row in storage.fetch_user_assets(user["id"])}
+
+
+def test_bulk_applies_mixed_adds_and_removes(client, storage, alice):
+    response = client.post("/users/alice/assets/bulk", json={"assets": [
+        {"asset": "btc", "quantity": 2.5},
+        {"asset": "eth", "quantity": -5},
+        {"asset": "sol", "quantity": 7},
+        {"asset": "btc", "quantity": -0.5}
+    ]})
+    assert response.status_code == 200
+    assets = {row["asset"]: row["quantity"] for row in response.json()["assets"]}
+    assert assets == {"btc": 12, "eth": 0, "sol": 7}
+    assert holdings(storage, alice) == {"btc": 12, "eth": 0, "sol": 7}
+
+
+def test_bulk_rejects_the_whole_batch_when_a_balance_would_go_negative(client, storage, alice):
+    response = client.post("/users/alice/assets/bulk", json={"assets": [
+        {"asset": "btc", "quantity": 1},
+        {"asset": "sol", "quantity": 3},
+        {"asset": "eth", "quantity": -6}
+    ]})
+    assert response.status_code == 400
+    assert holdings(storage, alice) == {"btc": 10, "eth": 5}
+
+
+def test_bulk_for_unknown_user_is_404(client, storage, alice):
+    response = client.post("/users/nobody/assets/bulk", json={"assets": [{"asset": "btc", "quantity": 1}]})
+    assert response.status_code == 404
+    assert holdings(storage, alice) == {"btc": 10, "eth": 5}
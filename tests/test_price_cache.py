@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import crypto_routes
+from benchmarks.stand_ins import install
+from models.crypto_asset import CryptoAsset, FetchAPI, price_cache
+from utils.cache import TTLCache
+
+
+@pytest.fixture
+def stand_ins():
+    with install() as stand_ins:
+        yield stand_ins
+
+
+def test_get_value_stores_the_price_not_the_response():
+    asset = CryptoAsset("btc", FetchAPI())
+    assert asset.get_value({"btc": {"usd": 65000.0}}) == 65000.0
+    assert asset.current_price == 65000.0
+
+
+def test_prices_are_matched_and_cached_case_insensitively(stand_ins):
+    client = TestClient(crypto_routes.app)
+    upper = client.get("/assets/BTC/price").json()["current_price"]
+    assert upper
+    assert client.get("/assets/btc/price").json()["current_price"] == upper
+    assert CryptoAsset.get_bulk_values(["Btc", "eth"], FetchAPI())["Btc"] == upper
+    assert stand_ins.calls.snapshot()["coingecko:simple/price"] == 2
+    assert price_cache.get("btc") == (True, upper)
+
+
+def test_stale_keys_refresh_once_on_the_shared_executor():
+    cache = TTLCache(ttl=0.01, stale_ttl=60)
+    cache.set_many({"a": 1, "b": 2})
+    time.sleep(0.02)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader(keys):
+        calls.append((tuple(keys), threading.current_thread().name))
+        started.set()
+        release.wait(5)
+        return {key: 10 for key in keys}
+
+    assert cache.get_many_or_load(["a", "b"], loader) == {"a": 1, "b": 2}
+    assert started.wait(5)
+    # Already being reloaded, so served stale without a second refresh
+    assert cache.get_many_or_load(["a", "b"], loader) == {"a": 1, "b": 2}
+    release.set()
+    for _ in range(100):
+        if cache.get("a") == (True, 10):
+            break
+        time.sleep(0.01)
+    assert cache.get("b") == (True, 10)
+    assert len(calls) == 1
+    assert calls[0][1].startswith("blocking")
+    assert cache.get_stats()["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_the_old_value_and_is_counted():
+    cache = TTLCache(ttl=0.01, stale_ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    def loader(keys):
+        raise ConnectionError("upstream down")
+
+    assert cache.get_many_or_load(["a"], loader) == {"a": 1}
+    for _ in range(100):
+        if cache.get_stats()["refresh_errors"]:
+            break
+        time.sleep(0.01)
+    assert cache.get_stats()["refresh_errors"] == 1
+    assert cache.get("a") == (True, 1)
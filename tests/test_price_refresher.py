@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import portfolio_routes
+from benchmarks.stand_ins import install
+from services.price_refresher import price_refresher
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("PRICE_REFRESHER_ENABLED", raising=False)
+    with install() as stand_ins:
+        user = stand_ins.storage.insert_user("alice", "alice@example.com", 30)
+        stand_ins.storage.upsert_asset(user["id"], "btc", 2)
+        with TestClient(portfolio_routes.app) as client:
+            yield client
+
+
+def test_refresher_stops_after_the_last_feed_disconnects(client):
+    with client.websocket_connect("/users/alice/valuation/ws") as first:
+        assert first.receive_json()["type"] == "snapshot"
+        with client.websocket_connect("/users/alice/valuation/ws") as second:
+            assert second.receive_json()["type"] == "snapshot"
+            assert price_refresher.get_status()["running"]
+        # One feed is still open
+        assert price_refresher.get_status()["running"]
+    assert not price_refresher.get_status()["running"]
+
+
+def test_refresher_keeps_running_when_enabled_by_env(client, monkeypatch):
+    monkeypatch.setenv("PRICE_REFRESHER_ENABLED", "1")
+    with client.websocket_connect("/users/alice/valuation/ws") as feed:
+        assert feed.receive_json()["type"] == "snapshot"
+    assert price_refresher.get_status()["running"]
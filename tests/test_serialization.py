@@ -0,0 +1,33 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils import serialization
+
+CONTENT = {
+    "value": float("nan"),
+    "values": [1.5, float("inf"), None],
+    "array": np.array([1.0, np.nan, 3.0]),
+    "scalar": np.float64("nan"),
+    "count": np.int64(3),
+    "nested": ({"x": -float("inf")},)
+}
+EXPECTED = {
+    "value": None,
+    "values": [1.5, None, None],
+    "array": [1.0, None, 3.0],
+    "scalar": None,
+    "count": 3,
+    "nested": [{"x": None}]
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_writes_nan_as_null(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    encoded = serialization.dumps(CONTENT)
+    assert json.loads(encoded, parse_constant=lambda name: pytest.fail(f"bare {name} in output")) == EXPECTED
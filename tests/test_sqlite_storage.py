@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database.sqlite_backend import SQLiteStorage
+
+THREADS = 8
+ROUNDS = 50
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "portfolio.db")
+
+
+def run_threads(target):
+    start = threading.Barrier(THREADS)
+    errors = []
+
+    def worker(index):
+        start.wait()
+        try:
+            target(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_writers_never_lose_updates(path):
+    # Every thread has its own connection, as separate processes would
+    storages = [SQLiteStorage(path) for _ in range(THREADS)]
+    user_id = storages[0].insert_user("alice", "alice@example.com", 30)["id"]
+    storages[0].upsert_asset(user_id, "eth", 1000)
+
+    def write(index):
+        storage = storages[index]
+        for _ in range(ROUNDS):
+            storage.adjust_asset_quantity(user_id, "btc", 1)
+            storage.apply_asset_deltas(user_id, [
+                {"asset": "btc", "quantity": 2},
+                {"asset": "eth", "quantity": -1},
+                {"asset": f"coin{index}", "quantity": 1}
+            ])
+            storage.adjust_asset_quantity(user_id, "eth", 0.5)
+
+    run_threads(write)
+    quantities = {row["asset"]: row["quantity"] for row in storages[0].fetch_user_assets(user_id)}
+    assert quantities.pop("btc") == THREADS * ROUNDS * 3
+    assert quantities.pop("eth") == 1000 - THREADS * ROUNDS * 0.5
+    assert quantities == {f"coin{index}": ROUNDS for index in range(THREADS)}
+
+
+def test_concurrent_removals_never_go_negative(path):
+    storages = [SQLiteStorage(path) for _ in range(THREADS)]
+    user_id = storages[0].insert_user("bob", "bob@example.com", 40)["id"]
+    storages[0].upsert_asset(user_id, "btc", 100)
+    rejected = []
+
+    def remove(index):
+        for _ in range(ROUNDS):
+            try:
+                storages[index].apply_asset_deltas(user_id, [
+                    {"asset": "btc", "quantity": -1},
+                    {"asset": "eth", "quantity": 1}
+                ])
+            except sqlite3.IntegrityError:
+                rejected.append(index)
+
+    run_threads(remove)
+    quantities = {row["asset"]: row["quantity"] for row in storages[0].fetch_user_assets(user_id)}
+    # Exactly 100 batches fit the balance, the rest were rejected as a whole
+    assert quantities == {"btc": 0, "eth": 100}
+    assert len(rejected) == THREADS * ROUNDS - 100
+
+
+def test_removal_without_holding_is_rejected(path):
+    storage = SQLiteStorage(path)
+    user_id = storage.insert_user("carol", "carol@example.com", 50)["id"]
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.adjust_asset_quantity(user_id, "btc", -1)
+    assert storage.fetch_user_assets(user_id) == []
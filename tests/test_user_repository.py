@@ -0,0 +1,42 @@
+import pytest
+
+from repositories import user_repository
+from repositories.user_repository import UserRepository
+
+
+@pytest.fixture(autouse=True)
+def negative_cache(monkeypatch):
+    monkeypatch.setattr(user_repository, "USER_CACHE_NEGATIVE", True)
+
+
+@pytest.mark.parametrize("column, old, new", [
+    ("name", "alice", "alicia"),
+    ("email", "alice@example.com", "alicia@example.com")
+])
+def test_update_forgets_negative_entry_for_new_value(storage, column, old, new):
+    user = UserRepository.input_user_data("alice", "alice@example.com", 30)
+    lookup = UserRepository.fetch_users if column == "name" else UserRepository.find_user_by_email
+    # Cache a miss for the value the user is about to take
+    assert lookup(new) is None
+    UserRepository.update(user["id"], column, new)
+    assert lookup(new)["id"] == user["id"]
+    assert lookup(old) is None
+
+
+def test_iter_users_raises_when_a_page_fails(storage, monkeypatch):
+    for index in range(5):
+        UserRepository.input_user_data(f"user{index}", f"user{index}@example.com", 20 + index)
+    fetch = storage.fetch_users_page
+
+    def failing_fetch(after_id, limit, columns):
+        if after_id is not None:
+            raise ConnectionError("database went away")
+        return fetch(after_id, limit, columns)
+
+    monkeypatch.setattr(storage, "fetch_users_page", failing_fetch)
+    pages = UserRepository.iter_users(page_size=2)
+    assert [user["name"] for user in next(pages)] == ["user0", "user1"]
+    with pytest.raises(ConnectionError):
+        next(pages)
+    # Single page lookups keep reporting failures as None
+    assert UserRepository.fetch_users_page(after_id=2) is None
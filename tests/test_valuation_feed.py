@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from api.routes import portfolio_routes
+from benchmarks.stand_ins import install
+from services import valuation_feed as valuation_feed_module
+from services.price_refresher import price_refresher
+from services.valuation_feed import ValuationFeed, valuation_feed
+
+
+def test_slow_subscriber_queue_is_bounded_and_merged(monkeypatch):
+    monkeypatch.setattr(valuation_feed_module, "VALUATION_QUEUE_MAX_SIZE", 2)
+    feed = ValuationFeed()
+
+    async def scenario():
+        holdings = [{"asset": "btc", "quantity": 1, "value": 1}, {"asset": "eth", "quantity": 2, "value": 2}]
+        subscription = feed.subscribe(holdings, asyncio.get_running_loop())
+        for price in range(2, 7):
+            feed.publish({"btc": price} if price % 2 else {"eth": price})
+            await asyncio.sleep(0)
+        queued = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        return queued
+
+    queued = asyncio.run(scenario())
+    assert len(queued) <= 2
+    merged = {}
+    for delta in queued:
+        merged.update(delta["assets"])
+    # Nothing is lost: the latest value of every asset and the latest total arrive
+    assert merged == {"btc": 5, "eth": 12}
+    assert queued[-1]["total_value"] == 5 + 12
+
+
+class ClosedWebSocket:
+    """Accepts and sends the snapshot, then fails like a socket whose client went away."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        if self.sent:
+            raise RuntimeError('Cannot call "send" once a close message has been sent.')
+        self.sent.append(data)
+
+    async def receive_text(self):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+@pytest.fixture
+def alice(monkeypatch):
+    monkeypatch.delenv("PRICE_REFRESHER_ENABLED", raising=False)
+    with install() as stand_ins:
+        user = stand_ins.storage.insert_user("alice", "alice@example.com", 30)
+        stand_ins.storage.upsert_asset(user["id"], "btc", 2)
+        yield user
+
+
+def test_send_after_disconnect_releases_the_subscription(alice):
+    async def scenario():
+        websocket = ClosedWebSocket()
+        handler = asyncio.create_task(portfolio_routes.portfolio_valuation_feed(websocket, "alice"))
+        while valuation_feed.get_stats()["subscriptions"] == 0:
+            await asyncio.sleep(0.01)
+        assert price_refresher.get_status()["running"]
+        valuation_feed.publish({"btc": 1.0})
+        await asyncio.wait_for(handler, 5)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+    assert websocket.sent[0]["type"] == "snapshot"
+    assert valuation_feed.get_stats() == {"symbols": 0, "subscriptions": 0}
+    assert not price_refresher.get_status()["running"]
@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from utils.executor import submit_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe, size-bounded cache with time-to-live and stale-while-revalidate.
+
+    Entries younger than ``ttl`` are fresh. Entries older than ``ttl`` but younger than
+    ``ttl + stale_ttl`` are stale: they are still returned immediately while they are
+    reloaded on the shared blocking executor, at most one reload per key at a time, so
+    hot keys never block on the upstream source. Older entries are treated as misses. When the cache is full the least recently used entry is evicted.
+    """
+
+    def __init__(self, ttl=5.0, max_size=1024, stale_ttl=30.0):
+        """Initialize an empty cache.
+
+        Args:
+            ttl (float): Seconds an entry stays fresh
+            max_size (int): Maximum number of entries before LRU eviction
+            stale_ttl (float): Extra seconds a stale entry may be served while it is reloaded
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _lookup(self, key, now):
+        """Return (value, state) for a key, where state is 'fresh', 'stale' or 'miss'.
+
+        Must be called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        value, stored_at = entry
+        age = now - stored_at
+        if age <= self.ttl:
+            state = "fresh"
+        elif age <= self.ttl + self.stale_ttl:
+            state = "stale"
+        else:
+            del self._entries[key]
+            return None, "miss"
+        self._entries.move_to_end(key)
+        return value, state
+
+    def get(self, key):
+        """Return the cached value for a key if it is fresh or stale, without loading.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            tuple: (found, value)
+        """
+        with self._lock:
+            value, state = self._lookup(key, time.monotonic())
+            if state == "miss":
+                self._stats["misses"] += 1
+                return False, None
+            self._stats["hits" if state == "fresh" else "stale_hits"] += 1
+            return True, value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        self.set_many({key: value})
+
+    def set_many(self, mapping):
+        """Store several values at once with the same timestamp.
+
+        Args:
+            mapping (dict): Mapping of key to value
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        """Remove a key from the cache if present.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Remove every entry whose value matches a predicate.
+
+        Args:
+            predicate (callable): Function taking a cached value and returning True to remove it
+        """
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def age(self, key):
+        """Return how many seconds ago a key was stored, or None if it is not cached.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[1]
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for a key, calling loader() on a miss.
+
+        Args:
+            key: Cache key
+            loader (callable): Zero-argument function returning the value for key
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        return self.get_many_or_load([key], lambda keys: {key: loader()})[key]
+
+    def get_many_or_load(self, keys, loader):
+        """Return cached values for many keys, loading all misses with one loader call.
+
+        Stale values are returned as-is and reloaded in the background; a key that is
+        already being reloaded is not scheduled again.
+
+        Args:
+            keys (list): Cache keys
+            loader (callable): Function taking a list of keys and returning a dict of values
+
+        Returns:
+            dict: Mapping of key to value for every requested key the loader could provide
+        """
+        results = {}
+        missing = []
+        stale = []
+        now = time.monotonic()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                value, state = self._lookup(key, now)
+                if state == "fresh":
+                    self._stats["hits"] += 1
+                    results[key] = value
+                elif state == "stale":
+                    self._stats["stale_hits"] += 1
+                    results[key] = value
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        stale.append(key)
+                else:
+                    self._stats["misses"] += 1
+                    missing.append(key)
+            if stale:
+                self._stats["refreshes"] += 1
+        if stale:
+            submit_blocking(self._refresh, stale, loader)
+        if missing:
+            loaded = loader(missing)
+            self.set_many(loaded)
+            results.update(loaded)
+        return results
+
+    def _refresh(self, keys, loader):
+        """Reload stale keys in the background, keeping the old values on failure."""
+        try:
+            self.set_many(loader(keys))
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            logger.exception("Error refreshing %d stale cache keys", len(keys))
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def get_stats(self):
+        """Report cache effectiveness counters.
+
+        Returns:
+            dict: Hits, stale hits, misses, evictions, background refreshes and their
+                failures, current size and hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of the thread pool that runs blocking calls (requests, supabase, yfinance)
+# on behalf of the async route handlers
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+_stats_lock = threading.Lock()
+_stats = {"submitted": 0, "pending": 0, "max_pending": 0}
+
+
+def _tracked(func):
+    """Wrap func so the pending counter is decremented once it has run."""
+    @functools.wraps(func)
+    def wrapper():
+        try:
+            return func()
+        finally:
+            with _stats_lock:
+                _stats["pending"] -= 1
+    return wrapper
+
+
+def submit_blocking(func, *args, **kwargs):
+    """Schedule a blocking function on the dedicated executor from synchronous code.
+
+    Args:
+        func (callable): Blocking function to call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        concurrent.futures.Future: Future resolving to the return value of func
+    """
+    with _stats_lock:
+        _stats["submitted"] += 1
+        _stats["pending"] += 1
+        _stats["max_pending"] = max(_stats["max_pending"], _stats["pending"])
+    return _executor.submit(_tracked(functools.partial(func, *args, **kwargs)))
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the dedicated executor without blocking the event loop.
+
+    Args:
+        func (callable): Blocking function to call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+    """
+    return await asyncio.wrap_future(submit_blocking(func, *args, **kwargs))
+
+
+async def iterate_blocking(iterable):
+    """Iterate a blocking iterable from async code, running every step on the executor.
+
+    Use it for generators that do I/O between items (e.g. streamed responses), so their
+    work stays on the dedicated executor instead of Starlette's default threadpool.
+
+    Args:
+        iterable (iterable): Blocking iterable, e.g. a generator
+
+    Yields:
+        Each item of iterable
+    """
+    done = object()
+    iterator = await run_blocking(iter, iterable)
+    while True:
+        item = await run_blocking(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def get_executor_stats():
+    """Report executor sizing and load.
+
+    Returns:
+        dict: Worker count, total submitted calls, calls currently queued or running,
+            and the highest number seen at once
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = BLOCKING_WORKERS
+    return stats
@@ -0,0 +1,200 @@
+import io
+import json
+import math
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from utils.executor import iterate_blocking
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Formats a time-series route can answer with, and the media type of each
+SERIES_FORMATS = {
+    "records": "application/json",
+    "columnar": "application/json",
+    "csv": "text/csv",
+    "arrow": ARROW_MEDIA_TYPE,
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+# Formats that are streamed chunk by chunk instead of built in memory
+STREAMING_FORMATS = ("ndjson", "sse")
+
+
+def _finite_or_none(content):
+    """Recursively convert NumPy values to Python ones and NaN or infinity to None."""
+    if isinstance(content, dict):
+        return {key: _finite_or_none(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_finite_or_none(value) for value in content]
+    if isinstance(content, np.ndarray):
+        return _finite_or_none(content.tolist())
+    if isinstance(content, np.generic):
+        content = content.item()
+    if isinstance(content, float) and not math.isfinite(content):
+        return None
+    return content
+
+
+def dumps(content):
+    """Encode content as JSON bytes with orjson when available, NaN becoming null.
+
+    Both encoders write NaN and infinity as null, so the output is always valid JSON.
+
+    Args:
+        content: JSON-serializable content, may contain NumPy arrays
+
+    Returns:
+        bytes: Encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_finite_or_none(content), separators=(",", ":"), allow_nan=False).encode()
+
+
+def series_columns(series):
+    """Split a date-indexed Series into parallel date strings and float values.
+
+    Dates are formatted and NaN values replaced in one vectorized pass.
+
+    Args:
+        series (pandas.Series): Series indexed by date
+
+    Returns:
+        tuple: (list of 'YYYY-MM-DD' strings, list of floats with None for NaN)
+    """
+    dates = pd.DatetimeIndex(series.index).strftime("%Y-%m-%d").tolist()
+    values = series.to_numpy(dtype=float)
+    values = np.where(np.isnan(values), None, values).tolist()
+    return dates, values
+
+
+def series_to_records(series):
+    """Convert a Series to a list of {'date': ..., 'value': ...} dictionaries.
+
+    Args:
+        series (pandas.Series): Series indexed by date
+
+    Returns:
+        list: One dictionary per row, None for NaN values
+    """
+    dates, values = series_columns(series)
+    return [{"date": date, "value": value} for date, value in zip(dates, values)]
+
+
+def negotiate_format(fmt, accept):
+    """Pick the response format from an explicit format parameter or the Accept header.
+
+    Args:
+        fmt (str): Value of the 'format' query parameter, may be None
+        accept (str): Value of the Accept header, may be None
+
+    Returns:
+        str: One of the SERIES_FORMATS keys
+    """
+    if fmt:
+        if fmt not in SERIES_FORMATS:
+            raise HTTPException(status_code=406, detail=f"Unsupported format: {fmt}")
+        return fmt
+    accept = accept or ""
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    if "text/event-stream" in accept:
+        return "sse"
+    if "text/csv" in accept:
+        return "csv"
+    return "records"
+
+
+def series_response(series, meta, fmt="records"):
+    """Build a response for a date-indexed Series in the requested format.
+
+    'records' keeps the original list of date/value objects, 'columnar' returns
+    parallel 'dates' and 'values' arrays, 'csv' returns date,value rows and 'arrow'
+    returns an Arrow IPC stream with the metadata attached to the schema. The
+    streaming formats are handled by streaming_series_response.
+
+    Args:
+        series (pandas.Series): Series indexed by date
+        meta (dict): Fields describing the series (asset, window, period, ...)
+        fmt (str): One of the SERIES_FORMATS keys
+
+    Returns:
+        fastapi.Response: Encoded response
+    """
+    if fmt == "records":
+        return Response(dumps({**meta, "data": series_to_records(series)}), media_type=SERIES_FORMATS[fmt])
+    if fmt == "columnar":
+        dates = pd.DatetimeIndex(series.index).strftime("%Y-%m-%d").tolist()
+        content = {**meta, "data": {"dates": dates, "values": series.to_numpy(dtype=float)}}
+        if orjson is None:
+            content["data"]["values"] = series_columns(series)[1]
+        return Response(dumps(content), media_type=SERIES_FORMATS[fmt])
+    if fmt == "csv":
+        buffer = io.StringIO()
+        frame = series.rename("value").to_frame()
+        frame.to_csv(buffer, index_label="date", date_format="%Y-%m-%d")
+        return Response(buffer.getvalue(), media_type=SERIES_FORMATS[fmt])
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=406, detail="Arrow format requires pyarrow")
+    table = pa.table({
+        "date": pa.array(pd.DatetimeIndex(series.index).tz_localize(None).normalize().to_numpy(dtype="datetime64[ms]")),
+        "value": pa.array(series.to_numpy(dtype=float), from_pandas=True),
+    }).replace_schema_metadata({key: str(value) for key, value in meta.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=SERIES_FORMATS[fmt])
+
+
+async def stream_series(chunks, meta, fmt="ndjson"):
+    """Encode Series chunks as NDJSON lines or server-sent events as they arrive.
+
+    NDJSON starts with a {"meta": ...} line followed by one {"date", "value"} line per
+    row. SSE sends a 'meta' event, one 'data' event per chunk and a final 'end' event.
+    Chunks are produced on the blocking executor, since computing one may fetch history.
+
+    Args:
+        chunks (iterable): pandas.Series chunks, e.g. from Analytics.iter_indicator
+        meta (dict): Fields describing the series (asset, window, period, ...)
+        fmt (str): 'ndjson' or 'sse'
+
+    Yields:
+        bytes: Encoded chunk
+    """
+    if fmt == "sse":
+        yield b"event: meta\ndata: " + dumps(meta) + b"\n\n"
+        async for chunk in iterate_blocking(chunks):
+            yield b"event: data\ndata: " + dumps(series_to_records(chunk)) + b"\n\n"
+        yield b"event: end\ndata: {}\n\n"
+        return
+    yield dumps({"meta": meta}) + b"\n"
+    async for chunk in iterate_blocking(chunks):
+        records = series_to_records(chunk)
+        if records:
+            yield b"\n".join(dumps(record) for record in records) + b"\n"
+
+
+def streaming_series_response(chunks, meta, fmt):
+    """Wrap stream_series in a StreamingResponse with the right media type.
+
+    Args:
+        chunks (iterable): pandas.Series chunks
+        meta (dict): Fields describing the series
+        fmt (str): 'ndjson' or 'sse'
+
+    Returns:
+        fastapi.responses.StreamingResponse: Streamed response
+    """
+    return StreamingResponse(stream_series(chunks, meta, fmt), media_type=SERIES_FORMATS[fmt])
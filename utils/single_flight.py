@@ -0,0 +1,73 @@
+import threading
+
+
+class _Call:
+    """A single in-flight call whose result is shared by every waiting caller."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is still
+    running wait for it and receive the same result (or exception) instead of issuing
+    their own identical upstream request.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "deduplicated": 0}
+
+    def do(self, key, fn):
+        """Run fn() for key, or wait for the identical call already in flight.
+
+        Args:
+            key: Hashable identifier of the call (e.g., the request URL)
+            fn (callable): Zero-argument function performing the call
+
+        Returns:
+            The result of fn(), possibly produced by another caller
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self._stats["deduplicated"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def get_stats(self):
+        """Report how many calls were made and how many were served by another caller.
+
+        Returns:
+            dict: Total calls, deduplicated calls and calls currently in flight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats